@@ -0,0 +1,174 @@
+"""Initial schema
+
+Matches what Base.metadata.create_all produced before migrations were
+introduced, so existing databases are stamped at this revision. The
+table set is exposed through baseline_metadata() so init_db can bring a
+pre-migration database up to exactly this revision (and no further)
+before stamping it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _table_columns() -> dict[str, list[sa.Column]]:
+    """Fresh Column objects per table (a Column can belong to only one Table)."""
+    return {
+        "user_profiles": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("phone", sa.String(50), nullable=True),
+            sa.Column("location", sa.String(255), nullable=True),
+            sa.Column("bio", sa.Text(), nullable=True),
+            sa.Column("skills", sa.JSON(), nullable=True),
+            sa.Column("experience", sa.JSON(), nullable=True),
+            sa.Column("projects", sa.JSON(), nullable=True),
+            sa.Column("education", sa.JSON(), nullable=True),
+            sa.Column("links", sa.JSON(), nullable=True),
+            sa.Column("resume_url", sa.String(500), nullable=True),
+            sa.Column("achievements", sa.JSON(), nullable=True),
+            sa.Column("certifications", sa.JSON(), nullable=True),
+            sa.Column("languages", sa.JSON(), nullable=True),
+            sa.Column("interests", sa.Text(), nullable=True),
+            sa.Column("context_block", sa.Text(), nullable=True),
+            sa.Column("context_hash", sa.String(80), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        "companies": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("founder_name", sa.String(255), nullable=True),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("industry", sa.String(255), nullable=True),
+            sa.Column("size", sa.String(100), nullable=True),
+            sa.Column("website", sa.String(500), nullable=True),
+            sa.Column("location", sa.String(255), nullable=True),
+            sa.Column("culture_notes", sa.Text(), nullable=True),
+            sa.Column("values", sa.JSON(), nullable=True),
+            sa.Column("tech_stack", sa.JSON(), nullable=True),
+            sa.Column("job_role", sa.String(255), nullable=True),
+            sa.Column("job_description", sa.Text(), nullable=True),
+            sa.Column("requirements", sa.JSON(), nullable=True),
+            sa.Column("recent_news", sa.Text(), nullable=True),
+            sa.Column("why_interested", sa.Text(), nullable=True),
+            sa.Column("contact_info", sa.JSON(), nullable=True),
+            sa.Column("context_block", sa.Text(), nullable=True),
+            sa.Column("context_hash", sa.String(80), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        "examples": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "generation_type",
+                sa.Enum("COLD_EMAIL", "COLD_DM", "APPLICATION", name="exampletype"),
+                nullable=False,
+            ),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("quality_rating", sa.Float(), nullable=False),
+            sa.Column("title", sa.String(255), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        "generation_plans": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_profile_id", sa.Integer(), nullable=False),
+            sa.Column("company_id", sa.Integer(), nullable=False),
+            sa.Column("generation_type", sa.String(50), nullable=False),
+            sa.Column("tone", sa.String(100), nullable=True),
+            sa.Column("profile_hash", sa.String(80), nullable=False),
+            sa.Column("company_hash", sa.String(80), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("pinned", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        "generation_jobs": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_profile_id", sa.Integer(), nullable=False),
+            sa.Column("generation_type", sa.String(50), nullable=False),
+            sa.Column("tone", sa.String(100), nullable=False),
+            sa.Column("max_length", sa.Integer(), nullable=False),
+            sa.Column("additional_context", sa.Text(), nullable=True),
+            sa.Column("cache_mode", sa.String(20), nullable=False),
+            sa.Column("plan_model", sa.String(100), nullable=True),
+            sa.Column("write_model", sa.String(100), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("total_tasks", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        "generation_tasks": [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_id", sa.Integer(), nullable=False),
+            sa.Column("company_id", sa.Integer(), nullable=False),
+            sa.Column("position", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("worker_id", sa.String(100), nullable=True),
+            sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("result", sa.JSON(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+    }
+
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_user_profiles_id", "user_profiles", ["id"], False),
+    ("ix_user_profiles_email", "user_profiles", ["email"], True),
+    ("ix_companies_id", "companies", ["id"], False),
+    ("ix_companies_name", "companies", ["name"], False),
+    ("ix_examples_id", "examples", ["id"], False),
+    ("ix_examples_generation_type", "examples", ["generation_type"], False),
+    ("ix_generation_plans_id", "generation_plans", ["id"], False),
+    ("ix_generation_plans_user_profile_id", "generation_plans", ["user_profile_id"], False),
+    ("ix_generation_plans_company_id", "generation_plans", ["company_id"], False),
+    ("ix_generation_plans_lookup", "generation_plans", ["profile_hash", "company_hash", "generation_type"], False),
+    ("ix_generation_jobs_id", "generation_jobs", ["id"], False),
+    ("ix_generation_jobs_user_profile_id", "generation_jobs", ["user_profile_id"], False),
+    ("ix_generation_jobs_status", "generation_jobs", ["status"], False),
+    ("ix_generation_tasks_id", "generation_tasks", ["id"], False),
+    ("ix_generation_tasks_job_id", "generation_tasks", ["job_id"], False),
+    ("ix_generation_tasks_claim", "generation_tasks", ["status", "lease_expires_at"], False),
+]
+
+
+def baseline_metadata() -> sa.MetaData:
+    """This revision's tables and indexes as a MetaData, for create_all(checkfirst=True)."""
+    metadata = sa.MetaData()
+    tables = {name: sa.Table(name, metadata, *columns) for name, columns in _table_columns().items()}
+    for name, table, columns, unique in INDEXES:
+        sa.Index(name, *(tables[table].c[column] for column in columns), unique=unique)
+    return metadata
+
+
+def upgrade() -> None:
+    for name, columns in _table_columns().items():
+        op.create_table(name, *columns)
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    op.drop_table("generation_tasks")
+    op.drop_table("generation_jobs")
+    op.drop_table("generation_plans")
+    op.drop_table("examples")
+    op.drop_table("companies")
+    op.drop_table("user_profiles")
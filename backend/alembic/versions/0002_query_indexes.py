@@ -0,0 +1,43 @@
+"""Indexes for the hot query shapes
+
+- examples: few-shot lookup filters by generation_type and orders by
+  quality_rating DESC with a small LIMIT. The composite index serves the
+  filter, the order and the limit without a sort, and makes the
+  single-column generation_type index redundant.
+- companies: listings are ordered by created_at (id as tie-breaker) and
+  filtered by industry.
+
+Profiles are looked up by email, which already has a unique index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_examples_type_rating",
+        "examples",
+        ["generation_type", sa.text("quality_rating DESC")],
+    )
+    op.drop_index("ix_examples_generation_type", table_name="examples")
+
+    op.create_index("ix_companies_created_at", "companies", ["created_at", "id"])
+    op.create_index("ix_companies_industry", "companies", ["industry"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_companies_industry", table_name="companies")
+    op.drop_index("ix_companies_created_at", table_name="companies")
+
+    op.create_index("ix_examples_generation_type", "examples", ["generation_type"])
+    op.drop_index("ix_examples_type_rating", table_name="examples")
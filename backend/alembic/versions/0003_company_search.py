@@ -0,0 +1,81 @@
+"""Full-text search over companies
+
+An FTS5 index over the searchable company fields, stored as an external
+content table so the text isn't duplicated. Triggers keep it in sync with
+every write to companies, including executemany bulk inserts. Prefix
+indexes of 2 and 3 characters keep autocomplete queries cheap.
+
+A later batch-mode migration that rebuilds the companies table drops
+these triggers with it and must recreate them.
+
+SQLite only; other databases skip this revision and search falls back to
+LIKE matching.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    "name",
+    "industry",
+    "location",
+    "description",
+    "job_role",
+    "job_description",
+    "tech_stack",
+    "requirements",
+]
+
+
+def _values(prefix: str) -> str:
+    return ", ".join(f"{prefix}.{column}" for column in COLUMNS)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    columns = ", ".join(COLUMNS)
+    op.execute(
+        f"CREATE VIRTUAL TABLE companies_fts USING fts5({columns}, "
+        "content='companies', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER companies_fts_insert AFTER INSERT ON companies BEGIN "
+        f"INSERT INTO companies_fts(rowid, {columns}) VALUES (new.id, {_values('new')}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER companies_fts_delete AFTER DELETE ON companies BEGIN "
+        f"INSERT INTO companies_fts(companies_fts, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {_values('old')}); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER companies_fts_update AFTER UPDATE ON companies BEGIN "
+        f"INSERT INTO companies_fts(companies_fts, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {_values('old')}); "
+        f"INSERT INTO companies_fts(rowid, {columns}) VALUES (new.id, {_values('new')}); "
+        "END"
+    )
+    # Index companies that existed before this revision
+    op.execute("INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS companies_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS companies_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS companies_fts_insert")
+    op.execute("DROP TABLE IF EXISTS companies_fts")
@@ -0,0 +1,32 @@
+"""Cache version counters
+
+One row per in-process cache. Writers bump the row in the same
+transaction as their change, so every uvicorn worker can tell its copy
+is stale with a single primary-key lookup.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    cache_versions = op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.bulk_insert(cache_versions, [{"name": "examples", "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
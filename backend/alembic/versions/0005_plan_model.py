@@ -0,0 +1,28 @@
+"""Record which model made each stored plan
+
+Stored plans are only reused for generations that plan with the same
+model. Plans stored before this revision don't record one, so they're
+no longer picked up automatically; they can still be used by plan_id.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("generation_plans") as batch_op:
+        batch_op.add_column(sa.Column("model", sa.String(100), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("generation_plans") as batch_op:
+        batch_op.drop_column("model")
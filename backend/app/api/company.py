@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
-from app.models import Company
-from app.schemas import CompanyCreate, CompanyUpdate, CompanyResponse
+from app.database import get_db, get_read_db
+from app.metrics import observe_stage
+from app.models import Company, UserProfile
+from app.schemas import CompanyCreate, CompanyUpdate, CompanyResponse, CompanyImportResponse, CompanyMatchResponse
+from app.services.company_import import ImportTooLargeError, import_companies
+from app.services.company_matcher import company_match_index
+from app.services.company_search import search_companies
+from app.services.context_blocks import refresh_company_context
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, stream_ndjson
 
 router = APIRouter()
 
@@ -16,31 +24,170 @@ async def create_company(
     """Create a new company entry."""
     company_data = company.model_dump()
     db_company = Company(**company_data)
+    refresh_company_context(db_company)
 
     db.add(db_company)
     await db.commit()
     await db.refresh(db_company)
+    company_match_index.upsert(db_company)
 
     return db_company
 
 
+@router.post("/companies/import", response_model=CompanyImportResponse)
+async def import_companies_file(
+    request: Request,
+    format: Literal["csv", "jsonl"] | None = Query(
+        None, description="Defaults to the request's Content-Type (text/csv or application/x-ndjson)"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import companies from a raw CSV or JSON Lines request body.
+
+    The body is parsed as it streams in and inserted in batches of
+    COMPANY_IMPORT_BATCH_SIZE, each committed on its own. Invalid rows and
+    duplicates (same name or website as a stored company or an earlier
+    row) are skipped and listed in the response with their line numbers.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "json" in content_type:
+            format = "jsonl"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl"
+            )
+
+    try:
+        return await import_companies(db, request.stream(), format)
+    except ImportTooLargeError as e:
+        # Batches committed before the limit was hit are kept
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    finally:
+        # Bulk inserts don't return IDs; rebuild the match index from the table instead
+        company_match_index.invalidate()
+
+
 @router.get("/companies", response_model=list[CompanyResponse])
 async def list_companies(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging; use cursor instead"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List all companies with pagination."""
-    result = await db.execute(select(Company).offset(skip).limit(limit))
+    """
+    List companies in creation order with keyset pagination.
+
+    When more rows remain, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    """
+    query = select(Company).order_by(Company.id)
+
+    if cursor:
+        try:
+            (last_id,) = decode_cursor(cursor, 1)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(Company.id > last_id)
+    elif skip:
+        query = query.offset(skip)
+
+    # One extra row tells us whether there's another page
+    result = await db.execute(query.limit(limit + 1))
     companies = result.scalars().all()
 
+    if len(companies) > limit:
+        companies = companies[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(companies[-1].id)
+
     return companies
 
 
+@router.get("/companies/search", response_model=list[CompanyResponse])
+async def search_companies_endpoint(
+    q: str | None = Query(None, max_length=200, description="Words to match; the last may be a prefix"),
+    industry: str | None = Query(None, description="Exact industry, case-insensitive"),
+    location: str | None = Query(None, description="Substring of the location"),
+    prefix: bool = Query(True, description="Match the last word as a prefix (autocomplete)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over name, role, description, tech stack and requirements.
+
+    Results are ranked by relevance, with name and role matches first.
+    """
+    return await search_companies(db, q, industry=industry, location=location, prefix=prefix, limit=limit)
+
+
+@router.get("/companies/match", response_model=list[CompanyMatchResponse])
+async def match_companies(
+    user_profile_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Rank companies by fit with a profile, best first.
+
+    Compares the profile's skills, project tech stacks and past roles with
+    each company's tech stack, requirements and role. Scores are relative
+    (higher is better); companies sharing no terms are left out.
+    """
+    result = await db.execute(select(UserProfile).where(UserProfile.id == user_profile_id))
+    profile = result.scalar_one_or_none()
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User profile with ID {user_profile_id} not found"
+        )
+
+    await company_match_index.ensure_loaded()
+    with observe_stage("match"):
+        matches = company_match_index.rank(profile, limit)
+    if not matches:
+        return []
+
+    # Names come from the table so renames show up and companies deleted elsewhere drop out
+    result = await db.execute(
+        select(Company.id, Company.name, Company.industry)
+        .where(Company.id.in_([match.company_id for match in matches]))
+    )
+    companies = {row.id: row for row in result.all()}
+
+    return [
+        CompanyMatchResponse(
+            company_id=match.company_id,
+            name=companies[match.company_id].name,
+            industry=companies[match.company_id].industry,
+            score=match.score,
+            matched_terms=match.matched_terms,
+        )
+        for match in matches
+        if match.company_id in companies
+    ]
+
+
+@router.get("/companies/export")
+async def export_companies():
+    """Stream every company as newline-delimited JSON."""
+    query = select(Company.__table__).order_by(Company.id)
+    return StreamingResponse(
+        stream_ndjson(query, CompanyResponse),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="companies.ndjson"'},
+    )
+
+
 @router.get("/companies/{company_id}", response_model=CompanyResponse)
 async def get_company(
     company_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific company by ID."""
     result = await db.execute(select(Company).where(Company.id == company_id))
@@ -75,9 +222,11 @@ async def update_company(
     update_data = company_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_company, field, value)
+    refresh_company_context(db_company)
 
     await db.commit()
     await db.refresh(db_company)
+    company_match_index.upsert(db_company)
 
     return db_company
 
@@ -99,5 +248,6 @@ async def delete_company(
 
     await db.delete(db_company)
     await db.commit()
+    company_match_index.remove(company_id)
 
     return None
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy import select, tuple_
+from app.database import get_db, get_read_db
 from app.models import Example
 from app.schemas import ExampleCreate, ExampleUpdate, ExampleResponse
+from app.services.cache_versions import EXAMPLES, bump_version
+from app.services.example_retriever import example_index
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, stream_ndjson
 
 router = APIRouter()
 
@@ -18,37 +22,78 @@ async def create_example(
     db_example = Example(**example_data)
 
     db.add(db_example)
+    version = await bump_version(db, EXAMPLES)
     await db.commit()
     await db.refresh(db_example)
+    example_index.upsert(db_example, version)
 
     return db_example
 
 
 @router.get("/examples", response_model=list[ExampleResponse])
 async def list_examples(
+    response: Response,
     generation_type: str | None = Query(None, description="Filter by generation type"),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging; use cursor instead"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List all examples with optional filtering by type."""
+    """
+    List examples, best-rated first, with optional filtering by type.
+
+    Keyset-paginated on (quality_rating, id); when more rows remain the
+    X-Next-Cursor response header holds the cursor for the next page.
+    """
     query = select(Example)
 
     if generation_type:
         query = query.where(Example.generation_type == generation_type)
 
-    query = query.order_by(Example.quality_rating.desc()).offset(skip).limit(limit)
+    if cursor:
+        try:
+            last_rating, last_id = decode_cursor(cursor, 2)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(tuple_(Example.quality_rating, Example.id) < (last_rating, last_id))
+    elif skip:
+        query = query.offset(skip)
+
+    query = query.order_by(Example.quality_rating.desc(), Example.id.desc()).limit(limit + 1)
 
     result = await db.execute(query)
     examples = result.scalars().all()
 
+    if len(examples) > limit:
+        examples = examples[:limit]
+        last = examples[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.quality_rating, last.id)
+
     return examples
 
 
+@router.get("/examples/export")
+async def export_examples(
+    generation_type: str | None = Query(None, description="Filter by generation type"),
+):
+    """Stream examples, best-rated first, as newline-delimited JSON."""
+    query = select(Example.__table__)
+
+    if generation_type:
+        query = query.where(Example.generation_type == generation_type)
+
+    query = query.order_by(Example.quality_rating.desc(), Example.id.desc())
+    return StreamingResponse(
+        stream_ndjson(query, ExampleResponse),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="examples.ndjson"'},
+    )
+
+
 @router.get("/examples/{example_id}", response_model=ExampleResponse)
 async def get_example(
     example_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific example by ID."""
     result = await db.execute(select(Example).where(Example.id == example_id))
@@ -84,8 +129,10 @@ async def update_example(
     for field, value in update_data.items():
         setattr(db_example, field, value)
 
+    version = await bump_version(db, EXAMPLES)
     await db.commit()
     await db.refresh(db_example)
+    example_index.upsert(db_example, version)
 
     return db_example
 
@@ -106,6 +153,8 @@ async def delete_example(
         )
 
     await db.delete(db_example)
+    version = await bump_version(db, EXAMPLES)
     await db.commit()
+    example_index.remove(example_id, version)
 
     return None
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from typing import AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
-from app.models import UserProfile, Company
+from app.config import get_settings
+from app.database import get_db, AsyncSessionLocal
+from app.models import UserProfile, Company, GenerationPlan
 from app.schemas import (
     GenerationRequest,
     GenerationResponse,
@@ -10,11 +15,132 @@ from app.schemas import (
     BulkGenerationResponse,
     RefineRequest,
     RefineResponse,
+    JobResponse,
 )
-from app.services.ai_service import ai_service
+from app.services.ai_service import ai_service, CacheMissError
+from app.services.loaders import load_companies
+from app.services.job_queue import enqueue_bulk_job, get_job_progress
+from app.services.llm_scheduler import llm_scheduler, LLMUnavailableError
+from app.services.llm_provider import check_model_override, UnknownModelError
+
+settings = get_settings()
 
 router = APIRouter()
 
+# Shared across requests so concurrent bulk calls can't overrun the LLM provider
+_bulk_semaphore = asyncio.Semaphore(settings.bulk_global_concurrency)
+
+
+async def _load_plan_content(db: AsyncSession, request: GenerationRequest) -> str | None:
+    """Fetch the request's stored plan for stage-2-only generation, checking it fits the request."""
+    if request.plan_id is None:
+        return None
+
+    if not request.use_chain_of_thought:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="plan_id requires use_chain_of_thought=true"
+        )
+
+    result = await db.execute(select(GenerationPlan).where(GenerationPlan.id == request.plan_id))
+    plan = result.scalar_one_or_none()
+
+    if not plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plan with ID {request.plan_id} not found"
+        )
+
+    if (
+        plan.user_profile_id != request.user_profile_id
+        or plan.company_id != request.company_id
+        or plan.generation_type != request.generation_type.value
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Plan {request.plan_id} was made for a different profile, company or generation type"
+        )
+
+    return plan.content
+
+
+def _check_model_overrides(*models: str | None) -> None:
+    """Reject per-request model overrides that aren't in the allowed list."""
+    try:
+        for model in models:
+            check_model_override(model)
+    except UnknownModelError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _llm_unavailable(error: LLMUnavailableError) -> HTTPException:
+    """503 for a provider still rate limited or down after the scheduler's retries."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"LLM provider is busy, try again shortly: {str(error)}",
+        headers={"Retry-After": str(int(settings.llm_retry_max_seconds))},
+    )
+
+
+def _sse_error(prefix: str, error: Exception) -> str:
+    """Error event for a failure after the stream has started, with the status it would have had."""
+    if isinstance(error, CacheMissError):
+        return _sse_event("error", {
+            "detail": str(error),
+            "status": status.HTTP_404_NOT_FOUND,
+        })
+    if isinstance(error, LLMUnavailableError):
+        return _sse_event("error", {
+            "detail": f"LLM provider is busy, try again shortly: {str(error)}",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "retry_after": int(settings.llm_retry_max_seconds),
+        })
+    return _sse_event("error", {
+        "detail": f"{prefix}: {str(error)}",
+        "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+    })
+
+
+async def _start_stream(events: AsyncIterator) -> AsyncIterator:
+    """
+    Wait for a stream's first event before the response starts, so a
+    provider that stays unavailable through the scheduler's retries gets
+    a 503 (and a cache-only miss a 404) instead of a 200 carrying an
+    error event. Other failures are re-raised inside the stream as before.
+    """
+    first = error = None
+    try:
+        first = await anext(events)
+    except StopAsyncIteration:
+        pass
+    except CacheMissError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
+    except Exception as e:
+        error = e
+
+    async def resumed():
+        if error is not None:
+            raise error
+        if first is not None:
+            yield first
+            async for item in events:
+                yield item
+
+    return resumed()
+
 
 @router.post("/generate", response_model=GenerationResponse)
 async def generate_content(
@@ -22,6 +148,8 @@ async def generate_content(
     db: AsyncSession = Depends(get_db)
 ):
     """Generate personalized content for a specific company."""
+    _check_model_overrides(request.plan_model, request.write_model)
+
     # Fetch user profile
     profile_result = await db.execute(
         select(UserProfile).where(UserProfile.id == request.user_profile_id)
@@ -46,9 +174,11 @@ async def generate_content(
             detail=f"Company with ID {request.company_id} not found"
         )
 
+    plan = await _load_plan_content(db, request)
+
     try:
         # Generate content using AI service with new features
-        generated_content, chain_of_thought = await ai_service.generate_content(
+        generated_content, chain_of_thought, cached = await ai_service.generate_content(
             profile=profile,
             company=company,
             generation_type=request.generation_type,
@@ -58,7 +188,14 @@ async def generate_content(
             use_chain_of_thought=request.use_chain_of_thought,
             use_examples=request.use_examples,
             db=db,
+            cache_mode=request.cache,
+            plan=plan,
+            plan_reuse=request.plan_reuse,
+            plan_model=request.plan_model,
+            write_model=request.write_model,
         )
+        # Persist a plan made during stage 1
+        await db.commit()
 
         return GenerationResponse(
             generated_content=generated_content,
@@ -73,9 +210,17 @@ async def generate_content(
                 "max_length": request.max_length,
                 "used_chain_of_thought": request.use_chain_of_thought,
                 "used_examples": request.use_examples,
+                "cached": cached,
             }
         )
 
+    except CacheMissError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -83,12 +228,131 @@ async def generate_content(
         )
 
 
-@router.post("/generate/bulk", response_model=BulkGenerationResponse)
+@router.post("/generate/stream")
+async def generate_content_stream(
+    request: GenerationRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream generated content as Server-Sent Events.
+
+    Emits a `plan` event once chain-of-thought planning finishes, `token`
+    events as the content is written, and a final `done` event carrying the
+    same payload as POST /generate (or an `error` event on failure).
+    """
+    _check_model_overrides(request.plan_model, request.write_model)
+
+    # Fetch user profile
+    profile_result = await db.execute(
+        select(UserProfile).where(UserProfile.id == request.user_profile_id)
+    )
+    profile = profile_result.scalar_one_or_none()
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User profile with ID {request.user_profile_id} not found"
+        )
+
+    # Fetch company
+    company_result = await db.execute(
+        select(Company).where(Company.id == request.company_id)
+    )
+    company = company_result.scalar_one_or_none()
+
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Company with ID {request.company_id} not found"
+        )
+
+    plan = await _load_plan_content(db, request)
+
+    # The request-scoped session is closed before the body is streamed,
+    # so the stream needs its own session for plan lookups and storage
+    stream_db = AsyncSessionLocal()
+    try:
+        events = await _start_stream(ai_service.generate_content_stream(
+            profile=profile,
+            company=company,
+            generation_type=request.generation_type,
+            tone=request.tone,
+            max_length=request.max_length,
+            additional_context=request.additional_context,
+            use_chain_of_thought=request.use_chain_of_thought,
+            use_examples=request.use_examples,
+            db=stream_db,
+            cache_mode=request.cache,
+            plan=plan,
+            plan_reuse=request.plan_reuse,
+            plan_model=request.plan_model,
+            write_model=request.write_model,
+        ))
+    except BaseException:
+        await stream_db.close()
+        raise
+
+    async def event_stream():
+        chain_of_thought = None
+        content_parts = []
+        cached = False
+
+        async with stream_db:
+            try:
+                async for event, text in events:
+                    if event == "plan":
+                        chain_of_thought = text
+                        yield _sse_event("plan", {"chain_of_thought": text})
+                    elif event == "meta":
+                        cached = text["cached"]
+                    else:
+                        content_parts.append(text)
+                        yield _sse_event("token", {"text": text})
+                await stream_db.commit()
+
+            except Exception as e:
+                yield _sse_error("Error generating content", e)
+                return
+
+        response = GenerationResponse(
+            generated_content="".join(content_parts),
+            generation_type=request.generation_type,
+            user_profile_id=request.user_profile_id,
+            company_id=request.company_id,
+            chain_of_thought=chain_of_thought,
+            metadata={
+                "company_name": company.name,
+                "user_name": profile.name,
+                "tone": request.tone,
+                "max_length": request.max_length,
+                "used_chain_of_thought": request.use_chain_of_thought,
+                "used_examples": request.use_examples,
+                "cached": cached,
+            }
+        )
+        yield _sse_event("done", response.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/generate/bulk", response_model=BulkGenerationResponse | JobResponse)
 async def generate_bulk_content(
     request: BulkGenerationRequest,
+    response: Response,
     db: AsyncSession = Depends(get_db)
 ):
-    """Generate personalized content for multiple companies."""
+    """
+    Generate personalized content for multiple companies.
+
+    With background=true the batch is queued as a job and 202 is returned
+    with its initial progress; poll GET /api/jobs/{id} for results.
+    """
+    _check_model_overrides(request.plan_model, request.write_model)
+
     # Fetch user profile
     profile_result = await db.execute(
         select(UserProfile).where(UserProfile.id == request.user_profile_id)
@@ -101,52 +365,77 @@ async def generate_bulk_content(
             detail=f"User profile with ID {request.user_profile_id} not found"
         )
 
-    results = []
-    failed = []
+    if request.background:
+        job = await enqueue_bulk_job(db, request)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await get_job_progress(db, job.id)
 
-    for company_id in request.company_ids:
-        try:
-            # Fetch company
-            company_result = await db.execute(
-                select(Company).where(Company.id == company_id)
-            )
-            company = company_result.scalar_one_or_none()
+    # Resolve companies up front so missing IDs fail fast without an LLM call
+    companies_by_id, _ = await load_companies(db, request.company_ids)
+    companies = [
+        (company_id, companies_by_id.get(company_id))
+        for company_id in request.company_ids
+    ]
 
-            if not company:
-                failed.append({
-                    "company_id": company_id,
-                    "error": f"Company with ID {company_id} not found"
-                })
-                continue
+    request_semaphore = asyncio.Semaphore(
+        request.max_concurrency or settings.bulk_max_concurrency
+    )
 
-            # Generate content
-            generated_content = await ai_service.generate_content(
+    async def generate_for_company(company: Company) -> GenerationResponse:
+        async with request_semaphore, _bulk_semaphore:
+            generated_content, chain_of_thought, cached = await ai_service.generate_content(
                 profile=profile,
                 company=company,
                 generation_type=request.generation_type,
                 tone=request.tone,
                 max_length=request.max_length,
                 additional_context=request.additional_context,
+                cache_mode=request.cache,
+                plan_model=request.plan_model,
+                write_model=request.write_model,
             )
 
-            results.append(GenerationResponse(
-                generated_content=generated_content,
-                generation_type=request.generation_type,
-                user_profile_id=request.user_profile_id,
-                company_id=company_id,
-                metadata={
-                    "company_name": company.name,
-                    "user_name": profile.name,
-                    "tone": request.tone,
-                    "max_length": request.max_length,
-                }
-            ))
+        return GenerationResponse(
+            generated_content=generated_content,
+            generation_type=request.generation_type,
+            user_profile_id=request.user_profile_id,
+            company_id=company.id,
+            chain_of_thought=chain_of_thought,
+            metadata={
+                "company_name": company.name,
+                "user_name": profile.name,
+                "tone": request.tone,
+                "max_length": request.max_length,
+                "cached": cached,
+            }
+        )
 
-        except Exception as e:
+    # gather() keeps results in request order; exceptions stay per-company
+    outcomes = await asyncio.gather(
+        *(generate_for_company(company) for _, company in companies if company),
+        return_exceptions=True,
+    )
+    outcome_iter = iter(outcomes)
+
+    results = []
+    failed = []
+
+    for company_id, company in companies:
+        if not company:
+            failed.append({
+                "company_id": company_id,
+                "error": f"Company with ID {company_id} not found"
+            })
+            continue
+
+        outcome = next(outcome_iter)
+        if isinstance(outcome, Exception):
             failed.append({
                 "company_id": company_id,
-                "error": str(e)
+                "error": str(outcome)
             })
+        else:
+            results.append(outcome)
 
     return BulkGenerationResponse(
         results=results,
@@ -155,6 +444,25 @@ async def generate_bulk_content(
     )
 
 
+@router.get("/generate/cache/stats")
+async def get_generation_cache_stats():
+    """Return hit/miss counters for the generation cache."""
+    return ai_service.cache.stats()
+
+
+@router.get("/generate/llm/stats")
+async def get_llm_scheduler_stats():
+    """Return queue depth, in-flight calls and retry counters for LLM calls."""
+    return llm_scheduler.stats()
+
+
+@router.delete("/generate/cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_generation_cache():
+    """Drop every cached generation."""
+    await ai_service.cache.clear()
+    return None
+
+
 @router.post("/generate/cold-email", response_model=GenerationResponse)
 async def generate_cold_email(
     user_profile_id: int,
@@ -233,6 +541,8 @@ async def refine_section(
     db: AsyncSession = Depends(get_db)
 ):
     """Refine a specific section of generated content based on user feedback."""
+    _check_model_overrides(request.model)
+
     # Fetch user profile
     profile_result = await db.execute(
         select(UserProfile).where(UserProfile.id == request.user_profile_id)
@@ -267,6 +577,7 @@ async def refine_section(
             section_to_replace=request.section_to_replace,
             user_feedback=request.user_feedback,
             tone=request.tone,
+            model=request.model,
         )
 
         return RefineResponse(
@@ -274,8 +585,83 @@ async def refine_section(
             original_section=request.section_to_replace,
         )
 
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error refining content: {str(e)}"
         )
+
+
+@router.post("/refine/stream")
+async def refine_section_stream(
+    request: RefineRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream a refined section as Server-Sent Events.
+
+    Emits `token` events as the section is rewritten and a final `done`
+    event carrying the same payload as POST /refine (or an `error` event).
+    """
+    _check_model_overrides(request.model)
+
+    # Fetch user profile
+    profile_result = await db.execute(
+        select(UserProfile).where(UserProfile.id == request.user_profile_id)
+    )
+    profile = profile_result.scalar_one_or_none()
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User profile with ID {request.user_profile_id} not found"
+        )
+
+    # Fetch company
+    company_result = await db.execute(
+        select(Company).where(Company.id == request.company_id)
+    )
+    company = company_result.scalar_one_or_none()
+
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Company with ID {request.company_id} not found"
+        )
+
+    events = await _start_stream(ai_service.refine_section_stream(
+        profile=profile,
+        company=company,
+        generation_type=request.generation_type,
+        full_content=request.full_content,
+        section_to_replace=request.section_to_replace,
+        user_feedback=request.user_feedback,
+        tone=request.tone,
+        model=request.model,
+    ))
+
+    async def event_stream():
+        refined_parts = []
+
+        try:
+            async for _, text in events:
+                refined_parts.append(text)
+                yield _sse_event("token", {"text": text})
+
+        except Exception as e:
+            yield _sse_error("Error refining content", e)
+            return
+
+        response = RefineResponse(
+            refined_section="".join(refined_parts).strip(),
+            original_section=request.section_to_replace,
+        )
+        yield _sse_event("done", response.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
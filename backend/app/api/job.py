@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
+from app.schemas import JobResponse
+from app.services.job_queue import get_job_progress
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get progress and finished results for a background bulk generation job."""
+    job = await get_job_progress(db, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+
+    return job
@@ -0,0 +1,166 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.database import get_db, get_read_db
+from app.models import UserProfile, Company, GenerationPlan
+from app.schemas import GenerationType, PlanCreate, PlanUpdate, PlanResponse
+from app.services.ai_service import ai_service
+from app.services.llm_provider import check_model_override, UnknownModelError
+
+router = APIRouter()
+
+
+@router.post("/plans", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
+async def create_plan(
+    request: PlanCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Run chain-of-thought planning only and store the plan for reuse."""
+    # Fetch user profile
+    profile_result = await db.execute(
+        select(UserProfile).where(UserProfile.id == request.user_profile_id)
+    )
+    profile = profile_result.scalar_one_or_none()
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User profile with ID {request.user_profile_id} not found"
+        )
+
+    # Fetch company
+    company_result = await db.execute(
+        select(Company).where(Company.id == request.company_id)
+    )
+    company = company_result.scalar_one_or_none()
+
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Company with ID {request.company_id} not found"
+        )
+
+    try:
+        check_model_override(request.model)
+    except UnknownModelError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    try:
+        plan = await ai_service.create_plan(
+            db,
+            profile,
+            company,
+            request.generation_type,
+            tone=request.tone,
+            pinned=request.pinned,
+            model=request.model,
+        )
+        await db.commit()
+        await db.refresh(plan)
+        return plan
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating plan: {str(e)}"
+        )
+
+
+@router.get("/plans", response_model=list[PlanResponse])
+async def list_plans(
+    user_profile_id: int | None = Query(None, description="Filter by user profile"),
+    company_id: int | None = Query(None, description="Filter by company"),
+    generation_type: GenerationType | None = Query(None, description="Filter by generation type"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List stored plans, pinned and newest first."""
+    query = select(GenerationPlan)
+
+    if user_profile_id is not None:
+        query = query.where(GenerationPlan.user_profile_id == user_profile_id)
+
+    if company_id is not None:
+        query = query.where(GenerationPlan.company_id == company_id)
+
+    if generation_type:
+        query = query.where(GenerationPlan.generation_type == generation_type.value)
+
+    query = query.order_by(
+        GenerationPlan.pinned.desc(), GenerationPlan.created_at.desc()
+    ).offset(skip).limit(limit)
+
+    result = await db.execute(query)
+    plans = result.scalars().all()
+
+    return plans
+
+
+@router.get("/plans/{plan_id}", response_model=PlanResponse)
+async def get_plan(
+    plan_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a specific plan by ID."""
+    result = await db.execute(select(GenerationPlan).where(GenerationPlan.id == plan_id))
+    plan = result.scalar_one_or_none()
+
+    if not plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plan with ID {plan_id} not found"
+        )
+
+    return plan
+
+
+@router.put("/plans/{plan_id}", response_model=PlanResponse)
+async def update_plan(
+    plan_id: int,
+    plan_update: PlanUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Edit a plan's content or pin/unpin it."""
+    result = await db.execute(select(GenerationPlan).where(GenerationPlan.id == plan_id))
+    db_plan = result.scalar_one_or_none()
+
+    if not db_plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plan with ID {plan_id} not found"
+        )
+
+    # Update only provided fields
+    update_data = plan_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_plan, field, value)
+
+    await db.commit()
+    await db.refresh(db_plan)
+
+    return db_plan
+
+
+@router.delete("/plans/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_plan(
+    plan_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a plan."""
+    result = await db.execute(select(GenerationPlan).where(GenerationPlan.id == plan_id))
+    db_plan = result.scalar_one_or_none()
+
+    if not db_plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Plan with ID {plan_id} not found"
+        )
+
+    await db.delete(db_plan)
+    await db.commit()
+
+    return None
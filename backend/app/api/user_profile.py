@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+import os
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import UserProfile
 from app.schemas import UserProfileCreate, UserProfileUpdate, UserProfileResponse
 from app.schemas.resume import ResumeParseRequest, ResumeParseResponse
+from app.services.llm_provider import check_model_override, UnknownModelError
 from app.services.resume_parser import resume_parser
+from app.services.uploads import spool_pdf_upload, UploadTooLargeError
+from app.services.context_blocks import refresh_profile_context
 
 router = APIRouter()
 
 
+def _check_parse_model(model: str | None) -> None:
+    """Reject a per-request parse model that isn't in the allowed list."""
+    try:
+        check_model_override(model)
+    except UnknownModelError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.post("/profile", response_model=UserProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_user_profile(
     profile: UserProfileCreate,
@@ -31,6 +46,7 @@ async def create_user_profile(
 
     # Create new profile
     db_profile = UserProfile(**profile_data)
+    refresh_profile_context(db_profile)
     db.add(db_profile)
     await db.commit()
     await db.refresh(db_profile)
@@ -40,7 +56,7 @@ async def create_user_profile(
 
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_user_profile(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get the user profile (assumes single user for now)."""
     result = await db.execute(select(UserProfile).limit(1))
@@ -58,7 +74,7 @@ async def get_user_profile(
 @router.get("/profile/{profile_id}", response_model=UserProfileResponse)
 async def get_user_profile_by_id(
     profile_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific user profile by ID."""
     result = await db.execute(select(UserProfile).where(UserProfile.id == profile_id))
@@ -93,6 +109,7 @@ async def update_user_profile(
     update_data = profile_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_profile, field, value)
+    refresh_profile_context(db_profile)
 
     await db.commit()
     await db.refresh(db_profile)
@@ -106,11 +123,14 @@ async def parse_resume_from_text(
     db: AsyncSession = Depends(get_db)
 ):
     """Parse resume from LaTeX or plain text and extract structured data."""
+    _check_parse_model(request.model)
+
     try:
-        parsed_data = await resume_parser.parse_resume(request.resume_text)
+        parsed_data, cached = await resume_parser.parse_resume_text(request.resume_text, request.model)
         return ResumeParseResponse(
             parsed_data=parsed_data,
-            message="Resume parsed successfully"
+            message="Resume parsed successfully",
+            cached=cached,
         )
     except ValueError as e:
         raise HTTPException(
@@ -127,10 +147,13 @@ async def parse_resume_from_text(
 @router.post("/profile/parse-resume-pdf", response_model=ResumeParseResponse)
 async def parse_resume_from_pdf(
     file: UploadFile = File(...),
+    model: str | None = Form(None, description="Override the model used for parsing"),
     db: AsyncSession = Depends(get_db)
 ):
     """Parse resume from uploaded PDF file and extract structured data."""
-    # Validate file type
+    _check_parse_model(model)
+
+    # Validate declared file type (magic bytes are checked while copying)
     if not file.content_type == "application/pdf":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -138,18 +161,27 @@ async def parse_resume_from_pdf(
         )
 
     try:
-        # Read PDF bytes
-        pdf_bytes = await file.read()
-
-        # Extract text from PDF
-        resume_text = await resume_parser.extract_text_from_pdf(pdf_bytes)
+        # Copy the upload to a named file for the PDF workers, rejecting oversize or non-PDF files
+        pdf_path, pdf_sha256 = await spool_pdf_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-        # Parse the extracted text
-        parsed_data = await resume_parser.parse_resume(resume_text)
+    try:
+        # Extract and parse the PDF (cached by file hash, then by extracted text)
+        parsed_data, cached = await resume_parser.parse_resume_pdf(pdf_path, pdf_sha256, model)
 
         return ResumeParseResponse(
             parsed_data=parsed_data,
-            message="Resume parsed successfully from PDF"
+            message="Resume parsed successfully from PDF",
+            cached=cached,
         )
     except ValueError as e:
         raise HTTPException(
@@ -161,6 +193,8 @@ async def parse_resume_from_pdf(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse PDF resume: {str(e)}"
         )
+    finally:
+        os.unlink(pdf_path)
 
 
 @router.delete("/profile/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -12,11 +12,115 @@ class Settings(BaseSettings):
 
     # Database settings
     database_url: str = "sqlite+aiosqlite:///./internship_app.db"
+    database_read_url: str | None = None  # Read replica; SQLite files get a read-only pool on the same file
+    db_echo: bool = False  # Log every SQL statement (slow; for debugging only)
+    db_pool_size: int = 5
+    db_read_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_auto_migrate: bool = True  # Run pending Alembic migrations on startup
+
+    # SQLite pragmas applied on connect
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"  # Safe with WAL; FULL fsyncs every commit
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    sqlite_busy_timeout_ms: int = 5000  # Wait for the write lock instead of failing with "database is locked"
+
+    # LLM provider: "gemini" or "fake" (in-process model for CI and load testing)
+    llm_provider: str = "gemini"
 
     # Gemini API settings
-    gemini_api_key: str
+    gemini_api_key: str | None = None  # Required when llm_provider is "gemini"
     gemini_model: str = "gemini-2.5-pro"
 
+    # Per-stage models (None falls back to gemini_model)
+    llm_plan_model: str | None = "gemini-2.5-flash"  # Chain-of-thought planning
+    llm_write_model: str | None = None
+    llm_write_model_by_type: dict[str, str] = {"cold_dm": "gemini-2.5-flash"}  # Generation type -> write model
+    llm_refine_model: str | None = "gemini-2.5-flash"
+    llm_parse_model: str | None = None
+    llm_allowed_models: list[str] = ["gemini-2.5-pro", "gemini-2.5-flash", "gemini-2.0-flash"]  # Valid per-request overrides
+
+    # Fake LLM settings (llm_provider = "fake")
+    fake_llm_ttft_seconds: float = 0.3  # Time to first token
+    fake_llm_tokens_per_second: float = 80.0
+    fake_llm_error_rate: float = 0.0  # Fraction of calls that raise a simulated 429
+    fake_llm_responses_path: str | None = None  # JSON list of {"match": ..., "response": ...}
+    fake_llm_seed: int | None = None
+
+    # LLM call scheduling (limits apply per model, across the whole process)
+    llm_requests_per_minute: int = 60
+    llm_tokens_per_minute: int = 1_000_000
+    llm_max_concurrency: int = 8  # Calls in flight per model
+    llm_max_retries: int = 4  # Retries for rate-limit and transient errors
+    llm_retry_base_seconds: float = 1.0
+    llm_retry_max_seconds: float = 30.0
+    llm_output_token_reserve: int = 1024  # Output tokens budgeted per call before usage is known
+
+    # Bulk generation settings
+    bulk_max_concurrency: int = 5  # Generations in flight per bulk request
+    bulk_global_concurrency: int = 10  # Generations in flight across all bulk requests
+
+    # Background job settings
+    job_worker_enabled: bool = True  # Run a job worker inside the API process
+    job_worker_concurrency: int = 3  # Tasks processed at once per worker
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 300  # Tasks whose lease lapses are picked up again
+    job_max_attempts: int = 3
+
+    # Generation cache settings
+    generation_cache_enabled: bool = True
+    generation_cache_max_entries: int = 512  # In-memory LRU size
+    generation_cache_ttl_seconds: int = 86400
+    generation_cache_db_path: str | None = None  # e.g. "./generation_cache.db" to persist across restarts
+
+    # Stored plans
+    plan_keep_unpinned: int = 5  # Newest unpinned plans kept per profile, company and type
+
+    # Upload settings
+    max_upload_bytes: int = 10 * 1024 * 1024
+    upload_chunk_bytes: int = 64 * 1024
+
+    # Company import settings
+    company_import_max_bytes: int = 50 * 1024 * 1024
+    company_import_max_rows: int = 50_000
+    company_import_batch_size: int = 500  # Rows per INSERT batch and transaction
+
+    # Company match ranking
+    match_index_refresh_seconds: int = 300  # Reload to pick up writes made by other workers
+
+    # Few-shot example retrieval
+    example_retrieval_limit: int = 2  # Examples sent per generation
+    example_similarity_weight: float = 0.7  # Similarity vs. quality rating (0-1)
+    example_index_version_check_seconds: float = 5.0  # How often each worker checks for other workers' writes
+
+    # PDF extraction settings
+    pdf_pool_workers: int = 2  # Processes used for PDF text extraction
+    pdf_max_pages: int = 20
+    pdf_pages_per_worker: int = 4  # Larger documents are split across workers in chunks of this size
+    pdf_extract_timeout_seconds: float = 30.0
+
+    # Convert LaTeX resumes to plain text locally before prompting
+    resume_latex_prestrip: bool = True
+
+    # Split resumes into sections and extract them concurrently
+    resume_section_parallel: bool = True
+    resume_section_max_attempts: int = 2
+
+    # Resume parse cache settings
+    resume_cache_enabled: bool = True
+    resume_cache_max_entries: int = 128
+    resume_cache_ttl_seconds: int = 604800  # 7 days
+    resume_cache_db_path: str | None = None  # Persists parsed resumes (personal data) on disk; memory-only when unset
+    resume_cache_max_disk_entries: int = 2000
+
+    # Request tracing
+    tracing_enabled: bool = True  # Server-Timing header on every request
+    tracing_sample_rate: float = 0.1  # Fraction of requests whose spans are exported
+    tracing_exporter: str = "file"  # "file", "stdout" or "none"
+    tracing_file_path: str = "./traces.jsonl"
+
     # LangSmith settings (optional)
     langsmith_api_key: str | None = None
     langsmith_project: str | None = None
@@ -1,17 +1,93 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import MetaData, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import get_settings
+from app.metrics import instrument_engine
+from app import tracing
 
 settings = get_settings()
 
-# Create async engine
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True,
-)
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema create_all built before migrations existed
+_BASELINE_REVISION = "0001"
+
+
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(engine: AsyncEngine, read_only: bool = False) -> None:
+    """Set WAL and performance pragmas on every new SQLite connection."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _create_engine(url: str, pool_size: int, read_only: bool = False) -> AsyncEngine:
+    """Create an instrumented engine; SQLite files get a sized pool and pragmas."""
+    options = {
+        "echo": settings.db_echo,
+        "future": True,
+    }
+    if _is_sqlite_file(url):
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+    elif make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_pre_ping=True,
+        )
+
+    new_engine = create_async_engine(url, **options)
+    if _is_sqlite_file(url):
+        _apply_sqlite_pragmas(new_engine, read_only=read_only)
+
+    instrument_engine(new_engine.sync_engine)
+    tracing.instrument_engine(new_engine.sync_engine)
+    return new_engine
 
-# Create async session maker
+
+# Engine for writes (and reads that must see the same transaction)
+engine = _create_engine(settings.database_url, settings.db_pool_size)
+
+# Separate pool for read-only requests. With WAL, readers never wait on the
+# writer, so long list/export queries don't queue behind bulk job writes.
+# Points at DATABASE_READ_URL (e.g. a replica) when set.
+if settings.database_read_url or _is_sqlite_file(settings.database_url):
+    read_engine = _create_engine(
+        settings.database_read_url or settings.database_url,
+        settings.db_read_pool_size,
+        read_only=True,
+    )
+else:
+    read_engine = engine
+
+# Create async session makers
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -20,6 +96,14 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 # Create declarative base
 Base = declarative_base()
 
@@ -33,7 +117,93 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """Dependency for read-only sessions on the read pool."""
+    async with AsyncReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def _add_missing_columns(sync_conn, metadata: MetaData):
+    """Add nullable columns of metadata's tables that an existing table lacks."""
+    inspector = inspect(sync_conn)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(
+                f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+            )
+
+
+async def dispose_engines():
+    """Close every pooled connection."""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def _alembic_config(sync_conn=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    if sync_conn is not None:
+        # env.py runs migrations on this connection instead of opening its own
+        config.attributes["connection"] = sync_conn
+    return config
+
+
+def _schema_revisions(sync_conn) -> tuple[str | None, str]:
+    """Return the database's current revision and the migration head."""
+    current = MigrationContext.configure(sync_conn).get_current_revision()
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    return current, head
+
+
+def _upgrade_schema(sync_conn):
+    config = _alembic_config(sync_conn)
+    current = MigrationContext.configure(sync_conn).get_current_revision()
+
+    if current is None and inspect(sync_conn).has_table("companies"):
+        # Built by create_all before migrations existed: fill gaps up to the baseline
+        # revision only (later revisions create their own tables), then adopt it
+        baseline = ScriptDirectory.from_config(config).get_revision(_BASELINE_REVISION).module
+        metadata = baseline.baseline_metadata()
+        metadata.create_all(sync_conn, checkfirst=True)
+        _add_missing_columns(sync_conn, metadata)
+        command.stamp(config, _BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+
+
+def _upgrade_schema_locked(sync_conn):
+    """Upgrade under the database write lock, so concurrently starting processes migrate once."""
+    if sync_conn.dialect.name == "sqlite":
+        # The API and standalone workers may start together on a fresh file: whoever
+        # gets the lock migrates, the rest wait here and then find the schema at head
+        sync_conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    current, head = _schema_revisions(sync_conn)
+    if current != head:
+        _upgrade_schema(sync_conn)
+
+
 async def init_db():
-    """Initialize database tables."""
+    """Migrate the schema to head; a single version lookup when it's already there."""
+    async with engine.connect() as conn:
+        current, head = await conn.run_sync(_schema_revisions)
+
+    if current == head:
+        return
+
+    if not settings.db_auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`"
+        )
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema_locked)
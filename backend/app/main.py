@@ -1,19 +1,33 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import get_settings
-from app.database import init_db
+from app.database import init_db, dispose_engines
+from app.metrics import render_metrics
+from app.middleware import MetricsMiddleware, TracingMiddleware, UploadSizeLimitMiddleware
+from app.tracing import configure_langsmith, trace_exporter
+from app.services.example_retriever import example_index
+from app.services.job_queue import job_worker
+from app.services.resume_parser import resume_parser
 
 settings = get_settings()
+configure_langsmith()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for the FastAPI application."""
-    # Startup: Initialize database
+    # Startup: Initialize database, warm the example pool and resume any queued bulk jobs
     await init_db()
+    await example_index.ensure_loaded()
+    if settings.job_worker_enabled:
+        job_worker.start()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: let in-flight tasks finish; unfinished ones resume on next start
+    if settings.job_worker_enabled:
+        await job_worker.stop()
+    resume_parser.shutdown()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -29,8 +43,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Trace-Id"],
 )
 
+# Cap upload bodies while they're received, before the multipart form is parsed.
+# The file itself is also capped when it's spooled; the margin covers form overhead.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_upload_bytes + 64 * 1024,
+    paths={"/api/profile/parse-resume-pdf"},
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.company_import_max_bytes,
+    paths={"/api/companies/import"},
+)
+
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware, exporter=trace_exporter, excluded_paths={"/metrics", "/health"})
+
+# Outermost so latency covers the other middleware too
+app.add_middleware(MetricsMiddleware, excluded_paths={"/metrics"})
+
 
 @app.get("/")
 async def root():
@@ -48,9 +82,18 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # Import and include routers
-from app.api import user_profile, company, generate, example
+from app.api import user_profile, company, generate, example, plan, job
 app.include_router(user_profile.router, prefix="/api", tags=["user_profile"])
 app.include_router(company.router, prefix="/api", tags=["company"])
 app.include_router(generate.router, prefix="/api", tags=["generate"])
 app.include_router(example.router, prefix="/api", tags=["examples"])
+app.include_router(plan.router, prefix="/api", tags=["plans"])
+app.include_router(job.router, prefix="/api", tags=["jobs"])
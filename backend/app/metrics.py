@@ -0,0 +1,146 @@
+"""
+Prometheus metrics.
+
+Served at GET /metrics. When several uvicorn workers share a host, set
+PROMETHEUS_MULTIPROC_DIR so every worker's samples are aggregated.
+"""
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.tracing import span
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+_TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "app_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+STAGE_DURATION = Histogram(
+    "app_stage_duration_seconds",
+    "Latency of generation and parsing stages (plan, write, refine, parse, pdf_extract, examples, match)",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_CALL_DURATION = Histogram(
+    "app_llm_call_duration_seconds",
+    "LLM call latency from admission to last token, excluding scheduler queueing",
+    ["model", "mode"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "app_llm_time_to_first_token_seconds",
+    "Time from admission to the first streamed chunk",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_CALL_TOKENS = Histogram(
+    "app_llm_call_tokens",
+    "Tokens per LLM call (provider usage when reported, otherwise estimated)",
+    ["model", "direction"],
+    buckets=_TOKEN_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "app_llm_tokens_total",
+    "Tokens sent to and received from LLMs",
+    ["model", "direction"],
+)
+
+LLM_CALLS = Counter(
+    "app_llm_calls_total",
+    "Finished LLM calls by outcome",
+    ["model", "outcome"],
+)
+
+LLM_RETRIES = Counter(
+    "app_llm_retries_total",
+    "LLM call retries after rate-limit or transient errors",
+    ["model"],
+)
+
+LLM_IN_FLIGHT = Gauge(
+    "app_llm_in_flight",
+    "LLM calls currently running",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+LLM_QUEUED = Gauge(
+    "app_llm_queued",
+    "LLM calls waiting for a concurrency slot or rate-limit budget",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+CACHE_LOOKUPS = Counter(
+    "app_cache_lookups_total",
+    "Result cache lookups by outcome (hit, disk_hit, miss)",
+    ["cache", "result"],
+)
+
+DB_QUERY_DURATION = Histogram(
+    "app_db_query_duration_seconds",
+    "Database statement latency",
+    ["operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Time one pipeline stage, both as a histogram sample and as a trace span."""
+    with STAGE_DURATION.labels(stage).time(), span(stage):
+        yield
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record per-statement latency for a (sync) SQLAlchemy engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_times"].pop()
+        operation = (statement.split(None, 1) or ["OTHER"])[0].upper()
+        if operation not in _DB_OPERATIONS:
+            operation = "OTHER"
+        DB_QUERY_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        if context.connection is None or context.execution_context is None:
+            return
+        stack = context.connection.info.get("query_start_times")
+        if stack:
+            stack.pop()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serialize all metrics in the Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
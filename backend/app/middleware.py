@@ -0,0 +1,158 @@
+import json
+import time
+from starlette.datastructures import MutableHeaders
+from app.metrics import HTTP_REQUEST_DURATION
+from app.tracing import TraceExporter, end_trace, span, start_trace
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversize uploads with a 413.
+
+    A Content-Length over the limit is turned away before any of the body
+    is read. Otherwise the body is counted as it's received (chunked
+    uploads declare no length, and a declared length can be wrong): once
+    it crosses the limit the 413 is sent, the app sees the client as
+    disconnected, and anything it tries to send afterwards is dropped.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: set[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({
+            "detail": f"Upload exceeds the maximum size of {self.max_bytes // (1024 * 1024)} MB"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def receive_wrapper():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except Exception:
+            # The app failing on the "disconnect" is expected once we've answered
+            if not rejected:
+                raise
+
+
+class MetricsMiddleware:
+    """
+    Record HTTP latency per route template.
+
+    Labels use the matched route's path (e.g. /api/companies/{company_id})
+    rather than the raw URL so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, excluded_paths: set[str] | None = None):
+        self.app = app
+        self.excluded_paths = excluded_paths or set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope while dispatching
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+class TracingMiddleware:
+    """
+    Trace each request and report stage durations in a Server-Timing header.
+
+    Sampled traces also get an X-Trace-Id header and are exported once the
+    response (including any streamed body) has been sent.
+    """
+
+    def __init__(self, app, exporter: TraceExporter, excluded_paths: set[str] | None = None):
+        self.app = app
+        self.exporter = exporter
+        self.excluded_paths = excluded_paths or set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        trace = start_trace(f"{scope['method']} {scope['path']}", traceparent)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("Server-Timing", trace.server_timing())
+                if trace.sampled:
+                    response_headers.append("X-Trace-Id", trace.trace_id)
+            await send(message)
+
+        try:
+            with span("request", method=scope["method"], path=scope["path"]):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            end_trace()
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                trace.name = f"{scope['method']} {route}"
+            if trace.sampled:
+                await self.exporter.export(trace)
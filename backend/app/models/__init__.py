@@ -1,5 +1,19 @@
 from app.models.user_profile import UserProfile
 from app.models.company import Company
 from app.models.example import Example, ExampleType
+from app.models.plan import GenerationPlan
+from app.models.job import GenerationJob, GenerationTask, JobStatus, TaskStatus
+from app.models.cache_version import CacheVersion
 
-__all__ = ["UserProfile", "Company", "Example", "ExampleType"]
+__all__ = [
+    "UserProfile",
+    "Company",
+    "Example",
+    "ExampleType",
+    "GenerationPlan",
+    "GenerationJob",
+    "GenerationTask",
+    "JobStatus",
+    "TaskStatus",
+    "CacheVersion",
+]
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class CacheVersion(Base):
+    """
+    Version counter for an in-process cache.
+
+    Writers bump the counter in the same transaction as their change;
+    every worker compares it with the version it loaded to know when its
+    copy is stale.
+    """
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CacheVersion(name='{self.name}', version={self.version})>"
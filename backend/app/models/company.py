@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -36,9 +36,18 @@ class Company(Base):
     why_interested = Column(Text, nullable=True)  # User's reason for interest in this company
     contact_info = Column(JSON, default=dict, nullable=True)  # {"email": "...", "linkedin": "...", "contact_person": "..."}
 
+    # Materialized prompt context (see app/services/context_blocks.py)
+    context_block = Column(Text, nullable=True)
+    context_hash = Column(String(80), nullable=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_companies_created_at", "created_at", "id"),
+        Index("ix_companies_industry", "industry"),
+    )
+
     def __repr__(self):
         return f"<Company(id={self.id}, name='{self.name}', industry='{self.industry}')>"
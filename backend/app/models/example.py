@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -19,7 +19,7 @@ class Example(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Type of example
-    generation_type = Column(SQLEnum(ExampleType), nullable=False, index=True)
+    generation_type = Column(SQLEnum(ExampleType), nullable=False)
 
     # The actual example content
     content = Column(Text, nullable=False)
@@ -37,5 +37,10 @@ class Example(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Few-shot lookup: filter by type, best-rated first
+        Index("ix_examples_type_rating", generation_type, quality_rating.desc()),
+    )
+
     def __repr__(self):
         return f"<Example(id={self.id}, type='{self.generation_type}', rating={self.quality_rating})>"
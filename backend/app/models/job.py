@@ -0,0 +1,81 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    """Lifecycle states for a bulk generation job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class TaskStatus(str, enum.Enum):
+    """Lifecycle states for a single company within a job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class GenerationJob(Base):
+    """Bulk generation request queued for background workers."""
+
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Generation parameters shared by every task in the job
+    user_profile_id = Column(Integer, nullable=False, index=True)
+    generation_type = Column(String(50), nullable=False)
+    tone = Column(String(100), nullable=False, default="professional")
+    max_length = Column(Integer, nullable=False, default=500)
+    additional_context = Column(Text, nullable=True)
+    cache_mode = Column(String(20), nullable=False, default="prefer")
+    plan_model = Column(String(100), nullable=True)  # Per-request model overrides
+    write_model = Column(String(100), nullable=True)
+
+    status = Column(String(20), nullable=False, default=JobStatus.PENDING.value, index=True)
+    total_tasks = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<GenerationJob(id={self.id}, status='{self.status}', tasks={self.total_tasks})>"
+
+
+class GenerationTask(Base):
+    """One company's generation within a job, claimed by workers through a lease."""
+
+    __tablename__ = "generation_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, nullable=False, index=True)
+    company_id = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)  # Order within the original request
+
+    status = Column(String(20), nullable=False, default=TaskStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Lease held by the worker currently processing the task
+    worker_id = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Outcome
+    result = Column(JSON, nullable=True)  # GenerationResponse payload
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_generation_tasks_claim", "status", "lease_expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<GenerationTask(id={self.id}, job_id={self.job_id}, status='{self.status}')>"
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class GenerationPlan(Base):
+    """Chain-of-thought plan persisted so stage 2 can be re-run without re-planning."""
+
+    __tablename__ = "generation_plans"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # What the plan was made for
+    user_profile_id = Column(Integer, nullable=False, index=True)
+    company_id = Column(Integer, nullable=False, index=True)
+    generation_type = Column(String(50), nullable=False)
+    tone = Column(String(100), nullable=True)
+    model = Column(String(100), nullable=True)  # Planning model; stored plans are only reused for the same model
+
+    # Context hashes the plan was generated from - a plan only applies while both still match
+    profile_hash = Column(String(80), nullable=False)
+    company_hash = Column(String(80), nullable=False)
+
+    # The plan itself
+    content = Column(Text, nullable=False)
+
+    # Pinned plans win over newer unpinned ones
+    pinned = Column(Boolean, default=False, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_generation_plans_lookup", "profile_hash", "company_hash", "generation_type"),
+    )
+
+    def __repr__(self):
+        return f"<GenerationPlan(id={self.id}, type='{self.generation_type}', pinned={self.pinned})>"
@@ -33,6 +33,10 @@ class UserProfile(Base):
     languages = Column(JSON, default=list, nullable=True)  # ["English", "Spanish", ...]
     interests = Column(Text, nullable=True)
 
+    # Materialized prompt context (see app/services/context_blocks.py)
+    context_block = Column(Text, nullable=True)
+    context_hash = Column(String(80), nullable=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -7,9 +7,14 @@ from app.schemas.company import (
     CompanyCreate,
     CompanyUpdate,
     CompanyResponse,
+    CompanyImportError,
+    CompanyImportResponse,
+    CompanyMatchResponse,
 )
 from app.schemas.generation import (
     GenerationType,
+    CacheMode,
+    PlanReuse,
     GenerationRequest,
     GenerationResponse,
     BulkGenerationRequest,
@@ -23,6 +28,12 @@ from app.schemas.example import (
     ExampleUpdate,
     ExampleResponse,
 )
+from app.schemas.plan import (
+    PlanCreate,
+    PlanUpdate,
+    PlanResponse,
+)
+from app.schemas.job import JobResponse
 
 __all__ = [
     "UserProfileCreate",
@@ -31,7 +42,12 @@ __all__ = [
     "CompanyCreate",
     "CompanyUpdate",
     "CompanyResponse",
+    "CompanyImportError",
+    "CompanyImportResponse",
+    "CompanyMatchResponse",
     "GenerationType",
+    "CacheMode",
+    "PlanReuse",
     "GenerationRequest",
     "GenerationResponse",
     "BulkGenerationRequest",
@@ -42,4 +58,8 @@ __all__ = [
     "ExampleCreate",
     "ExampleUpdate",
     "ExampleResponse",
+    "PlanCreate",
+    "PlanUpdate",
+    "PlanResponse",
+    "JobResponse",
 ]
@@ -54,3 +54,28 @@ class CompanyResponse(CompanyBase):
     updated_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CompanyImportError(BaseModel):
+    """A row rejected by a company import."""
+    row: int
+    name: str | None = None
+    error: str
+
+
+class CompanyImportResponse(BaseModel):
+    """Summary of a company import."""
+    total_rows: int
+    created: int
+    duplicates: int
+    failed: int
+    errors: list[CompanyImportError] = Field(default_factory=list)
+
+
+class CompanyMatchResponse(BaseModel):
+    """A company ranked by fit with a user profile."""
+    company_id: int
+    name: str
+    industry: str | None = None
+    score: float
+    matched_terms: list[str] = Field(default_factory=list)
@@ -9,6 +9,20 @@ class GenerationType(str, Enum):
     APPLICATION = "application"
 
 
+class CacheMode(str, Enum):
+    """How a generation request should use the result cache."""
+    BYPASS = "bypass"  # Always call the LLM and don't store the result
+    PREFER = "prefer"  # Serve from cache when possible, otherwise generate and store
+    ONLY = "only"  # Serve from cache or fail without calling the LLM
+
+
+class PlanReuse(str, Enum):
+    """Which stored chain-of-thought plans a generation may reuse."""
+    NONE = "none"  # Always plan from scratch
+    EXACT = "exact"  # Reuse a plan made for the same profile, company, type and tone
+    ANY_TONE = "any_tone"  # Reuse a plan made for the same profile, company and type
+
+
 class GenerationRequest(BaseModel):
     """Schema for generation request."""
     user_profile_id: int = Field(..., description="ID of the user profile to use")
@@ -19,6 +33,11 @@ class GenerationRequest(BaseModel):
     max_length: int = Field(default=500, description="Maximum length of generated content in words")
     use_chain_of_thought: bool = Field(default=True, description="Use 2-stage chain-of-thought generation for better quality")
     use_examples: bool = Field(default=True, description="Include example emails in prompt for few-shot learning")
+    cache: CacheMode = Field(default=CacheMode.PREFER, description="How to use cached generations for identical requests")
+    plan_reuse: PlanReuse = Field(default=PlanReuse.EXACT, description="Which stored chain-of-thought plans may be reused")
+    plan_id: int | None = Field(None, description="Run only stage 2 using this stored plan")
+    plan_model: str | None = Field(None, description="Override the model used for chain-of-thought planning")
+    write_model: str | None = Field(None, description="Override the model used for writing")
 
 
 class GenerationResponse(BaseModel):
@@ -39,6 +58,11 @@ class BulkGenerationRequest(BaseModel):
     additional_context: str | None = None
     tone: str = "professional"
     max_length: int = 500
+    max_concurrency: int | None = Field(None, ge=1, le=20, description="Maximum generations to run at once (defaults to server setting)")
+    cache: CacheMode = Field(default=CacheMode.PREFER, description="How to use cached generations for identical requests")
+    background: bool = Field(default=False, description="Queue as a background job and poll GET /api/jobs/{id} instead of waiting")
+    plan_model: str | None = Field(None, description="Override the model used for chain-of-thought planning")
+    write_model: str | None = Field(None, description="Override the model used for writing")
 
 
 class BulkGenerationResponse(BaseModel):
@@ -57,6 +81,7 @@ class RefineRequest(BaseModel):
     section_to_replace: str = Field(..., description="The specific section to replace")
     user_feedback: str = Field(..., description="User's feedback on what they want different")
     tone: str = Field(default="professional", description="Tone to maintain")
+    model: str | None = Field(None, description="Override the model used for refining")
 
 
 class RefineResponse(BaseModel):
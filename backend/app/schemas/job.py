@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from app.schemas.generation import GenerationType, GenerationResponse
+
+
+class JobResponse(BaseModel):
+    """Schema for bulk generation job status and results."""
+    id: int
+    status: str = Field(..., description="pending, running or completed")
+    user_profile_id: int
+    generation_type: GenerationType
+    total_tasks: int
+    pending: int = Field(..., description="Tasks waiting for or held by a worker")
+    succeeded: int
+    failed_count: int
+    results: list[GenerationResponse] = Field(default_factory=list, description="Finished generations in request order")
+    failed: list[dict] = Field(default_factory=list, description="List of failed generations with error details")
+    created_at: datetime
+    completed_at: datetime | None = None
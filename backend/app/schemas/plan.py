@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, ConfigDict
+from datetime import datetime
+from app.schemas.generation import GenerationType
+
+
+class PlanCreate(BaseModel):
+    """Schema for generating and storing a chain-of-thought plan."""
+    user_profile_id: int = Field(..., description="ID of the user profile to plan for")
+    company_id: int = Field(..., description="ID of the company to plan for")
+    generation_type: GenerationType = Field(..., description="Type of content the plan is for")
+    tone: str = Field(default="professional", description="Target tone for the plan")
+    pinned: bool = Field(default=False, description="Prefer this plan over newer ones for the same profile/company/type")
+    model: str | None = Field(None, description="Override the model used for planning")
+
+
+class PlanUpdate(BaseModel):
+    """Schema for editing or pinning a stored plan."""
+    content: str | None = Field(None, min_length=1)
+    pinned: bool | None = None
+
+
+class PlanResponse(BaseModel):
+    """Schema for plan response."""
+    id: int
+    user_profile_id: int
+    company_id: int
+    generation_type: GenerationType
+    tone: str | None = None
+    model: str | None = None
+    content: str
+    pinned: bool
+    profile_hash: str
+    company_hash: str
+    created_at: datetime
+    updated_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,12 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ResumeParseRequest(BaseModel):
     """Schema for resume parsing request (text-based)."""
     resume_text: str
+    model: str | None = Field(None, description="Override the model used for parsing")
 
 
 class ResumeParseResponse(BaseModel):
     """Schema for resume parsing response."""
     parsed_data: dict
     message: str = "Resume parsed successfully"
+    cached: bool = Field(default=False, description="Whether the result came from the parse cache")
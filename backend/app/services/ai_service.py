@@ -1,133 +1,53 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import AsyncIterator
 from langchain.schema import HumanMessage
 from app.config import get_settings
+from app.metrics import observe_stage
 from app.models import UserProfile, Company
-from app.schemas.generation import GenerationType
+from app.schemas.generation import GenerationType, CacheMode, PlanReuse
+from app.services.cache import ResultCache
+from app.services.llm_provider import get_chat_model, resolve_stage_model
+from app.services.context_blocks import get_profile_context, get_company_context
+from app.services.example_retriever import example_index
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.example import Example
+from sqlalchemy import delete, select
+from app.models.plan import GenerationPlan
 
 settings = get_settings()
 
 
+class CacheMissError(LookupError):
+    """Raised when a cache-only generation request has no cached result."""
+
+
 class AIService:
     """Service for AI-powered content generation using LangChain and Gemini."""
 
     def __init__(self):
-        """Initialize the Gemini LLM."""
-        self.llm = ChatGoogleGenerativeAI(
-            model=settings.gemini_model,
-            google_api_key=settings.gemini_api_key,
-            temperature=0.8,  # Higher for more creative, varied output
-            convert_system_message_to_human=True,
+        """Initialize the generation cache; chat models are routed per stage."""
+        self.temperature = 0.8  # Higher for more creative, varied output
+        self.cache = ResultCache(
+            "generation",
+            max_entries=settings.generation_cache_max_entries,
+            ttl_seconds=settings.generation_cache_ttl_seconds,
+            db_path=settings.generation_cache_db_path,
         )
 
+    def _llm(self, model: str):
+        """Return the scheduled chat model for a model name."""
+        return get_chat_model(model, self.temperature)
+
     def _format_user_profile(self, profile: UserProfile) -> str:
-        """Format user profile into a readable string."""
-        profile_parts = [
-            f"Name: {profile.name}",
-            f"Email: {profile.email}",
-        ]
-
-        if profile.location:
-            profile_parts.append(f"Location: {profile.location}")
-
-        if profile.bio:
-            profile_parts.append(f"About: {profile.bio}")
-
-        if profile.skills:
-            profile_parts.append(f"Skills: {', '.join(profile.skills)}")
-
-        if profile.experience:
-            exp_list = []
-            for exp in profile.experience:
-                exp_str = f"- {exp.get('role', '')} at {exp.get('company', '')} ({exp.get('duration', '')})"
-                if exp.get('description'):
-                    exp_str += f": {exp.get('description')}"
-                exp_list.append(exp_str)
-            profile_parts.append(f"Experience:\n" + "\n".join(exp_list))
-
-        if profile.projects:
-            proj_list = []
-            for proj in profile.projects:
-                proj_str = f"- {proj.get('name', '')}: {proj.get('description', '')}"
-                if proj.get('tech_stack'):
-                    proj_str += f" (Tech: {', '.join(proj.get('tech_stack', []))})"
-                if proj.get('link'):
-                    proj_str += f" - {proj.get('link')}"
-                proj_list.append(proj_str)
-            profile_parts.append(f"Projects:\n" + "\n".join(proj_list))
-
-        if profile.education:
-            edu_list = []
-            for edu in profile.education:
-                edu_str = f"- {edu.get('degree', '')} from {edu.get('institution', '')} ({edu.get('year', '')})"
-                edu_list.append(edu_str)
-            profile_parts.append(f"Education:\n" + "\n".join(edu_list))
-
-        if profile.achievements:
-            profile_parts.append(f"Achievements: {', '.join(profile.achievements)}")
-
-        if profile.links:
-            links_list = [f"{key}: {value}" for key, value in profile.links.items() if value]
-            if links_list:
-                profile_parts.append(f"Links:\n" + "\n".join([f"- {link}" for link in links_list]))
-
-        return "\n\n".join(profile_parts)
+        """Return the profile's materialized context block."""
+        return get_profile_context(profile)[0]
 
     def _format_company_info(self, company: Company) -> str:
-        """Format company information into a readable string."""
-        company_parts = [
-            f"Company: {company.name}",
-        ]
-
-        if company.founder_name:
-            company_parts.append(f"Founded by: {company.founder_name}")
-
-        company_parts.append(f"What they do: {company.description}")
-
-        if company.industry:
-            company_parts.append(f"Industry: {company.industry}")
-
-        if company.size:
-            company_parts.append(f"Size: {company.size}")
-
-        if company.location:
-            company_parts.append(f"Location: {company.location}")
-
-        if company.values:
-            company_parts.append(f"Company Values: {', '.join(company.values)}")
-
-        if company.tech_stack:
-            company_parts.append(f"Tech Stack: {', '.join(company.tech_stack)}")
-
-        if company.job_role:
-            company_parts.append(f"Role you're applying for: {company.job_role}")
+        """Return the company's materialized context block."""
+        return get_company_context(company)[0]
 
-        if company.job_description:
-            company_parts.append(f"Role Description: {company.job_description}")
-
-        if company.requirements:
-            company_parts.append(f"Requirements:\n" + "\n".join([f"- {req}" for req in company.requirements]))
-
-        if company.culture_notes:
-            company_parts.append(f"Culture Notes: {company.culture_notes}")
-
-        if company.recent_news:
-            company_parts.append(f"Recent News: {company.recent_news}")
-
-        return "\n\n".join(company_parts)
-
-    async def _get_examples(self, db: AsyncSession, generation_type: GenerationType, limit: int = 3) -> list[str]:
-        """Fetch high-quality examples for few-shot learning."""
-        result = await db.execute(
-            select(Example)
-            .where(Example.generation_type == generation_type.value)
-            .order_by(Example.quality_rating.desc())
-            .limit(limit)
-        )
-        examples = result.scalars().all()
-        return [ex.content for ex in examples]
+    async def _get_examples(self, company: Company, generation_type: GenerationType, limit: int | None = None) -> list[str]:
+        """Pick few-shot examples closest to this company, weighted by quality rating."""
+        await example_index.ensure_loaded()
+        return example_index.select(generation_type, company, limit or settings.example_retrieval_limit)
 
     async def _generate_chain_of_thought(
         self,
@@ -136,6 +56,7 @@ class AIService:
         generation_type: GenerationType,
         tone: str,
         max_length: int,
+        model: str | None = None,
     ) -> str:
         """Stage 1: Generate a plan/outline using chain-of-thought reasoning."""
         user_info = self._format_user_profile(profile)
@@ -169,10 +90,122 @@ Provide a brief strategic outline (3-5 bullet points) that will guide the writin
 Keep it concise - this is just a plan, not the actual {content_type_name}."""
 
         messages = [HumanMessage(content=prompt)]
-        response = await self.llm.ainvoke(messages)
+        with observe_stage("plan"):
+            response = await self._llm(model or resolve_stage_model("plan")).ainvoke(messages)
         return response.content
 
-    async def _generate_with_plan(
+    async def _find_stored_plan(
+        self,
+        db: AsyncSession,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        tone: str,
+        plan_reuse: PlanReuse,
+        model: str,
+    ) -> GenerationPlan | None:
+        """Find a stored plan still valid for this profile/company and model, preferring pinned ones."""
+        query = select(GenerationPlan).where(
+            GenerationPlan.profile_hash == get_profile_context(profile)[1],
+            GenerationPlan.company_hash == get_company_context(company)[1],
+            GenerationPlan.generation_type == generation_type.value,
+            GenerationPlan.model == model,
+        )
+
+        if plan_reuse == PlanReuse.EXACT:
+            query = query.where(GenerationPlan.tone == tone)
+
+        result = await db.execute(
+            query
+            .order_by(GenerationPlan.pinned.desc(), GenerationPlan.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def create_plan(
+        self,
+        db: AsyncSession,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        tone: str = "professional",
+        max_length: int = 500,
+        pinned: bool = False,
+        model: str | None = None,
+    ) -> GenerationPlan:
+        """Run stage 1 and add the resulting plan to the session; the caller commits."""
+        model = model or resolve_stage_model("plan")
+        content = await self._generate_chain_of_thought(
+            profile, company, generation_type, tone, max_length, model
+        )
+
+        plan = GenerationPlan(
+            user_profile_id=profile.id,
+            company_id=company.id,
+            generation_type=generation_type.value,
+            tone=tone,
+            model=model,
+            profile_hash=get_profile_context(profile)[1],
+            company_hash=get_company_context(company)[1],
+            content=content,
+            pinned=pinned,
+        )
+        db.add(plan)
+        await db.flush()
+        await self._prune_plans(db, plan)
+        return plan
+
+    async def _prune_plans(self, db: AsyncSession, plan: GenerationPlan) -> None:
+        """Keep only the newest unpinned plans for this plan's profile, company and type."""
+        same_target = (
+            GenerationPlan.user_profile_id == plan.user_profile_id,
+            GenerationPlan.company_id == plan.company_id,
+            GenerationPlan.generation_type == plan.generation_type,
+            GenerationPlan.pinned.is_(False),
+        )
+        newest = (
+            select(GenerationPlan.id)
+            .where(*same_target)
+            .order_by(GenerationPlan.id.desc())
+            .limit(settings.plan_keep_unpinned)
+        )
+        await db.execute(
+            delete(GenerationPlan)
+            .where(*same_target, GenerationPlan.id.not_in(newest))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _resolve_plan(
+        self,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        tone: str,
+        max_length: int,
+        plan_reuse: PlanReuse,
+        db: AsyncSession | None,
+        model: str | None = None,
+    ) -> str:
+        """Reuse a stored plan when allowed, otherwise run stage 1 (persisting it if we have a db)."""
+        model = model or resolve_stage_model("plan")
+        if db is None:
+            return await self._generate_chain_of_thought(
+                profile, company, generation_type, tone, max_length, model
+            )
+
+        if plan_reuse != PlanReuse.NONE:
+            stored = await self._find_stored_plan(
+                db, profile, company, generation_type, tone, plan_reuse, model
+            )
+            if stored:
+                return stored.content
+
+        plan = await self.create_plan(
+            db, profile, company, generation_type, tone, max_length, model=model
+        )
+        return plan.content
+
+    def _build_generation_prompt(
         self,
         profile: UserProfile,
         company: Company,
@@ -183,7 +216,7 @@ Keep it concise - this is just a plan, not the actual {content_type_name}."""
         examples: list[str] = None,
         additional_context: str | None = None,
     ) -> str:
-        """Stage 2: Generate content following the plan."""
+        """Build the stage 2 prompt that writes content following the plan."""
         user_info = self._format_user_profile(profile)
         company_info = self._format_company_info(company)
 
@@ -258,8 +291,30 @@ CONTENT RULES:
 
 Write it now - don't overthink it, write like a human would:"""
 
+        return prompt
+
+    async def _generate_with_plan(
+        self,
+        profile: UserProfile,
+        company: Company,
+        plan: str,
+        generation_type: GenerationType,
+        tone: str,
+        max_length: int,
+        examples: list[str] = None,
+        additional_context: str | None = None,
+        model: str | None = None,
+    ) -> str:
+        """Stage 2: Generate content following the plan."""
+        prompt = self._build_generation_prompt(
+            profile, company, plan, generation_type,
+            tone, max_length, examples, additional_context
+        )
+
+        model = model or resolve_stage_model("write", generation_type.value)
         messages = [HumanMessage(content=prompt)]
-        response = await self.llm.ainvoke(messages)
+        with observe_stage("write"):
+            response = await self._llm(model).ainvoke(messages)
         return response.content
 
     def _get_content_type_instructions(self, generation_type: GenerationType) -> dict:
@@ -354,6 +409,40 @@ CLOSING:
 Write like you're emailing someone you respect but know casually. Natural. Specific. Human."""
             }
 
+    def _generation_cache_key(
+        self,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        tone: str,
+        max_length: int,
+        additional_context: str | None,
+        use_chain_of_thought: bool,
+        examples: list[str],
+        plan: str | None,
+        plan_reuse: PlanReuse,
+        models: tuple[str, str],
+    ) -> str:
+        """Hash every input that shapes the rendered prompts into a cache key."""
+        return ResultCache.make_key(
+            settings.llm_provider,
+            models,
+            profile.id,
+            profile.updated_at,
+            get_profile_context(profile)[1],
+            company.id,
+            company.updated_at,
+            get_company_context(company)[1],
+            generation_type.value,
+            tone,
+            max_length,
+            additional_context,
+            use_chain_of_thought,
+            examples,
+            plan,
+            plan_reuse.value,
+        )
+
     async def generate_content(
         self,
         profile: UserProfile,
@@ -365,65 +454,167 @@ Write like you're emailing someone you respect but know casually. Natural. Speci
         use_chain_of_thought: bool = True,
         use_examples: bool = True,
         db: AsyncSession | None = None,
-    ) -> tuple[str, str | None]:
+        cache_mode: CacheMode = CacheMode.PREFER,
+        plan: str | None = None,
+        plan_reuse: PlanReuse = PlanReuse.EXACT,
+        plan_model: str | None = None,
+        write_model: str | None = None,
+    ) -> tuple[str, str | None, bool]:
         """
         Generate content with optional chain-of-thought and few-shot learning.
 
-        Returns: (generated_content, chain_of_thought_plan)
+        Identical requests are served from the generation cache unless
+        cache_mode is BYPASS; CacheMissError is raised for ONLY on a miss.
+        When a plan is given, stage 1 is skipped; otherwise stored plans are
+        reused according to plan_reuse and new plans are persisted.
+        plan_model/write_model override the configured stage models.
+
+        Returns: (generated_content, chain_of_thought_plan, cached)
         """
         chain_of_thought = None
         examples = []
+        plan_model = resolve_stage_model("plan", override=plan_model)
+        write_model = resolve_stage_model("write", generation_type.value, write_model)
 
         # Fetch examples if requested
         if use_examples and db:
-            examples = await self._get_examples(db, generation_type, limit=3)
+            with observe_stage("examples"):
+                examples = await self._get_examples(company, generation_type)
+
+        use_cache = settings.generation_cache_enabled and cache_mode != CacheMode.BYPASS
+        cache_key = None
+
+        if use_cache:
+            cache_key = self._generation_cache_key(
+                profile, company, generation_type, tone, max_length,
+                additional_context, use_chain_of_thought, examples,
+                plan, plan_reuse, (plan_model, write_model)
+            )
+            cached = await self.cache.get(cache_key)
+            if cached:
+                return cached["content"], cached["chain_of_thought"], True
+
+        if cache_mode == CacheMode.ONLY:
+            raise CacheMissError("No cached generation found for this request")
 
         # Use 2-stage generation if requested
         if use_chain_of_thought:
-            # Stage 1: Planning
-            chain_of_thought = await self._generate_chain_of_thought(
-                profile, company, generation_type, tone, max_length
+            # Stage 1: Planning (skipped when a stored plan is given or reusable)
+            chain_of_thought = plan or await self._resolve_plan(
+                profile, company, generation_type, tone, max_length, plan_reuse, db, plan_model
             )
 
             # Stage 2: Generation with plan
             content = await self._generate_with_plan(
                 profile, company, chain_of_thought, generation_type,
-                tone, max_length, examples, additional_context
+                tone, max_length, examples, additional_context, write_model
             )
         else:
             # Single-stage generation (faster, lower quality)
             content = await self._generate_with_plan(
                 profile, company, "Write based on the information provided.",
-                generation_type, tone, max_length, examples, additional_context
+                generation_type, tone, max_length, examples, additional_context, write_model
             )
 
-        return content, chain_of_thought
+        if use_cache:
+            await self.cache.set(cache_key, {
+                "content": content,
+                "chain_of_thought": chain_of_thought,
+            })
 
-    async def refine_section(
+        return content, chain_of_thought, False
+
+    async def generate_content_stream(
         self,
         profile: UserProfile,
         company: Company,
         generation_type: GenerationType,
-        full_content: str,
-        section_to_replace: str,
-        user_feedback: str,
         tone: str = "professional",
-    ) -> str:
+        max_length: int = 500,
+        additional_context: str | None = None,
+        use_chain_of_thought: bool = True,
+        use_examples: bool = True,
+        db: AsyncSession | None = None,
+        cache_mode: CacheMode = CacheMode.PREFER,
+        plan: str | None = None,
+        plan_reuse: PlanReuse = PlanReuse.EXACT,
+        plan_model: str | None = None,
+        write_model: str | None = None,
+    ) -> AsyncIterator[tuple[str, str | dict]]:
         """
-        Refine a specific section of generated content based on user feedback.
-
-        Args:
-            profile: User profile
-            company: Company info
-            generation_type: Type of content
-            full_content: The full generated content for context
-            section_to_replace: The specific text to replace
-            user_feedback: What the user wants to change
-            tone: Tone to maintain
+        Streaming variant of generate_content.
 
-        Returns:
-            Refined section text
+        Yields ("plan", text) as soon as stage 1 finishes, then ("token", text)
+        for each stage 2 chunk as it arrives. A cache hit is replayed as a
+        plan event followed by a single token event. The last event is
+        ("meta", {"cached": bool}).
         """
+        examples = []
+        plan_model = resolve_stage_model("plan", override=plan_model)
+        write_model = resolve_stage_model("write", generation_type.value, write_model)
+
+        if use_examples and db:
+            with observe_stage("examples"):
+                examples = await self._get_examples(company, generation_type)
+
+        use_cache = settings.generation_cache_enabled and cache_mode != CacheMode.BYPASS
+        cache_key = None
+
+        if use_cache:
+            cache_key = self._generation_cache_key(
+                profile, company, generation_type, tone, max_length,
+                additional_context, use_chain_of_thought, examples,
+                plan, plan_reuse, (plan_model, write_model)
+            )
+            cached = await self.cache.get(cache_key)
+            if cached:
+                if cached["chain_of_thought"]:
+                    yield "plan", cached["chain_of_thought"]
+                yield "token", cached["content"]
+                yield "meta", {"cached": True}
+                return
+
+        if cache_mode == CacheMode.ONLY:
+            raise CacheMissError("No cached generation found for this request")
+
+        chain_of_thought = None
+        if use_chain_of_thought:
+            chain_of_thought = plan or await self._resolve_plan(
+                profile, company, generation_type, tone, max_length, plan_reuse, db, plan_model
+            )
+            yield "plan", chain_of_thought
+
+        prompt = self._build_generation_prompt(
+            profile, company, chain_of_thought or "Write based on the information provided.",
+            generation_type, tone, max_length, examples, additional_context
+        )
+
+        content_parts = []
+        messages = [HumanMessage(content=prompt)]
+        with observe_stage("write"):
+            async for chunk in self._llm(write_model).astream(messages):
+                if chunk.content:
+                    content_parts.append(chunk.content)
+                    yield "token", chunk.content
+
+        if use_cache:
+            await self.cache.set(cache_key, {
+                "content": "".join(content_parts),
+                "chain_of_thought": chain_of_thought,
+            })
+        yield "meta", {"cached": False}
+
+    def _build_refine_prompt(
+        self,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        full_content: str,
+        section_to_replace: str,
+        user_feedback: str,
+        tone: str,
+    ) -> str:
+        """Build the prompt for rewriting a single section."""
         user_info = self._format_user_profile(profile)
         company_info = self._format_company_info(company)
 
@@ -465,10 +656,72 @@ CRITICAL - Keep the same human writing style:
 
 Return ONLY the refined section - no explanations, no additional commentary."""
 
+        return prompt
+
+    async def refine_section(
+        self,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        full_content: str,
+        section_to_replace: str,
+        user_feedback: str,
+        tone: str = "professional",
+        model: str | None = None,
+    ) -> str:
+        """
+        Refine a specific section of generated content based on user feedback.
+
+        Args:
+            profile: User profile
+            company: Company info
+            generation_type: Type of content
+            full_content: The full generated content for context
+            section_to_replace: The specific text to replace
+            user_feedback: What the user wants to change
+            tone: Tone to maintain
+            model: Override for the configured refine model
+
+        Returns:
+            Refined section text
+        """
+        prompt = self._build_refine_prompt(
+            profile, company, generation_type, full_content,
+            section_to_replace, user_feedback, tone
+        )
+
         messages = [HumanMessage(content=prompt)]
-        response = await self.llm.ainvoke(messages)
+        with observe_stage("refine"):
+            response = await self._llm(resolve_stage_model("refine", override=model)).ainvoke(messages)
         return response.content.strip()
 
+    async def refine_section_stream(
+        self,
+        profile: UserProfile,
+        company: Company,
+        generation_type: GenerationType,
+        full_content: str,
+        section_to_replace: str,
+        user_feedback: str,
+        tone: str = "professional",
+        model: str | None = None,
+    ) -> AsyncIterator[tuple[str, str]]:
+        """
+        Streaming variant of refine_section.
+
+        Yields ("token", text) events as the refined section is written.
+        """
+        prompt = self._build_refine_prompt(
+            profile, company, generation_type, full_content,
+            section_to_replace, user_feedback, tone
+        )
+
+        messages = [HumanMessage(content=prompt)]
+        with observe_stage("refine"):
+            async for chunk in self._llm(resolve_stage_model("refine", override=model)).astream(messages):
+                if chunk.content:
+                    yield "token", chunk.content
+
 
 # Singleton instance
 ai_service = AIService()
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from app.metrics import CACHE_LOOKUPS
+
+
+class ResultCache:
+    """
+    Two-tier cache for expensive LLM results.
+
+    Entries live in an in-memory LRU and, when a db_path is given, in a SQLite
+    table that survives restarts and is shared between workers. Values must be
+    JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 512,
+        ttl_seconds: int = 86400,
+        db_path: str | None = None,
+        max_disk_entries: int = 10000,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._table = f"cache_{name}"
+        self._disk_ready = False
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash arbitrary JSON-serializable parts into a stable cache key."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return time.time() - stored_at < self.ttl_seconds
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived SQLite connection that commits on success."""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                if not self._disk_ready:
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {self._table} "
+                        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+                    )
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS ix_{self._table}_stored_at "
+                        f"ON {self._table} (stored_at)"
+                    )
+                    self._disk_ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def _disk_get(self, key: str) -> tuple[float, object] | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT stored_at, value FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _disk_set(self, key: str, stored_at: float, value: object) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), stored_at),
+            )
+            # Drop expired rows and anything past the size cap, oldest first
+            conn.execute(
+                f"DELETE FROM {self._table} WHERE stored_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN ("
+                f"SELECT key FROM {self._table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def _disk_clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self._table}")
+
+    def _memory_set(self, key: str, stored_at: float, value: object) -> None:
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> object | None:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and self._is_fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.labels(self.name, "hit").inc()
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+        if self.db_path:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry and self._is_fresh(entry[0]):
+                self._memory_set(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                CACHE_LOOKUPS.labels(self.name, "disk_hit").inc()
+                return entry[1]
+
+        self.misses += 1
+        CACHE_LOOKUPS.labels(self.name, "miss").inc()
+        return None
+
+    async def set(self, key: str, value: object) -> None:
+        """Store value under key in every configured tier."""
+        stored_at = time.time()
+        self._memory_set(key, stored_at, value)
+
+        if self.db_path:
+            await asyncio.to_thread(self._disk_set, key, stored_at, value)
+
+    async def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+
+        if self.db_path:
+            await asyncio.to_thread(self._disk_clear)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this cache."""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.db_path is not None,
+        }
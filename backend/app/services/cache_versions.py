@@ -0,0 +1,33 @@
+"""
+Cross-worker invalidation for in-process caches.
+
+Each cache has a CacheVersion row. Writers bump it in the same
+transaction as their change; readers compare it with the version they
+loaded and reload when it has moved.
+"""
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import CacheVersion
+
+EXAMPLES = "examples"
+
+
+async def get_version(db: AsyncSession, name: str) -> int:
+    result = await db.execute(select(CacheVersion.version).where(CacheVersion.name == name))
+    return result.scalar_one_or_none() or 0
+
+
+async def bump_version(db: AsyncSession, name: str) -> int:
+    """Increment a cache's version inside the caller's transaction and return the new value."""
+    result = await db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+        .returning(CacheVersion.version)
+        .execution_options(synchronize_session=False)
+    )
+    version = result.scalar_one_or_none()
+    if version is None:
+        await db.execute(insert(CacheVersion).values(name=name, version=1))
+        version = 1
+    return version
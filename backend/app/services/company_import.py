@@ -0,0 +1,250 @@
+"""
+Bulk company import from CSV or JSON Lines.
+
+The request body is consumed as a stream and parsed line by line; valid
+rows are inserted in executemany batches, one transaction per batch, and
+every rejected row is reported with its line number.
+"""
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models import Company
+from app.schemas import CompanyCreate
+from app.services.context_blocks import refresh_company_context
+
+settings = get_settings()
+
+# CompanyCreate fields that hold lists/objects; CSV cells are parsed into them
+_LIST_FIELDS = {"values", "tech_stack", "requirements"}
+_DICT_FIELDS = {"contact_info"}
+
+
+class ImportTooLargeError(ValueError):
+    """Raised when an import exceeds the configured size or row limit."""
+
+
+def normalize_name(name: str | None) -> str | None:
+    return " ".join(name.split()).casefold() if name else None
+
+
+def normalize_website(website: str | None) -> str | None:
+    """Reduce a URL to host + path so http/https, www. and trailing slashes don't matter."""
+    if not website:
+        return None
+    value = website.strip().lower()
+    for prefix in ("https://", "http://"):
+        if value.startswith(prefix):
+            value = value[len(prefix):]
+    if value.startswith("www."):
+        value = value[4:]
+    return value.rstrip("/") or None
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream incrementally and yield complete lines (with line endings)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    size = 0
+    buffer = ""
+
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > settings.company_import_max_bytes:
+            raise ImportTooLargeError(
+                f"Import exceeds the maximum size of {settings.company_import_max_bytes // (1024 * 1024)} MB"
+            )
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def _parse_csv_cell(field: str, value: str):
+    value = value.strip()
+    if not value:
+        return None
+    if field in _LIST_FIELDS:
+        if value.startswith("["):
+            return json.loads(value)
+        separator = ";" if ";" in value else ","
+        return [item.strip() for item in value.split(separator) if item.strip()]
+    if field in _DICT_FIELDS:
+        return json.loads(value)
+    return value
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    Yield (line_number, row) for each CSV record, using the first record as the header.
+
+    Quoted cells may span lines; list columns accept JSON arrays or
+    ";"/","-separated values, contact_info a JSON object.
+    """
+    header = None
+    record = ""
+    record_start = 0
+    line_number = 0
+
+    async for line in lines:
+        line_number += 1
+        if not record:
+            record_start = line_number
+        record += line
+
+        # An odd number of quotes means a quoted cell continues on the next line
+        if record.count('"') % 2:
+            continue
+
+        text, record = record, ""
+        if not text.strip():
+            continue
+
+        cells = next(csv.reader(io.StringIO(text)))
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+
+        try:
+            row = {
+                field: _parse_csv_cell(field, value)
+                for field, value in zip(header, cells)
+                if field
+            }
+            yield record_start, {field: value for field, value in row.items() if value is not None}
+        except json.JSONDecodeError as e:
+            yield record_start, ValueError(f"Invalid JSON in cell: {e}")
+
+    if record.strip():
+        yield record_start, ValueError("Unterminated quoted field")
+
+
+async def iter_jsonl_rows(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """Yield (line_number, row) for each non-blank JSON Lines record."""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Each line must be a JSON object")
+            continue
+        yield line_number, row
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def _load_existing_keys(db: AsyncSession) -> tuple[set[str], set[str]]:
+    """Normalized names and websites of every stored company."""
+    result = await db.execute(select(Company.name, Company.website))
+    names, websites = set(), set()
+    for name, website in result.all():
+        names.add(normalize_name(name))
+        if website:
+            websites.add(normalize_website(website))
+    return names, websites
+
+
+async def _insert_batch(db: AsyncSession, batch: list[dict]) -> None:
+    await db.execute(insert(Company), batch)
+    await db.commit()
+
+
+async def import_companies(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    file_format: str,
+) -> dict:
+    """
+    Import companies from a CSV or JSONL byte stream.
+
+    Rows are validated through CompanyCreate and skipped as duplicates when
+    their name or website matches a stored company or an earlier row.
+
+    Returns a summary with one error entry per rejected row.
+    """
+    lines = _iter_lines(chunks)
+    rows = iter_csv_rows(lines) if file_format == "csv" else iter_jsonl_rows(lines)
+
+    names, websites = await _load_existing_keys(db)
+    batch: list[dict] = []
+    errors: list[dict] = []
+    total = created = duplicates = 0
+
+    async for line_number, row in rows:
+        total += 1
+        if total > settings.company_import_max_rows:
+            raise ImportTooLargeError(
+                f"Import exceeds the maximum of {settings.company_import_max_rows} rows"
+            )
+
+        if isinstance(row, Exception):
+            errors.append({"row": line_number, "name": None, "error": str(row)})
+            continue
+
+        try:
+            company = CompanyCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append({
+                "row": line_number,
+                "name": row.get("name"),
+                "error": _format_validation_error(e),
+            })
+            continue
+
+        name_key = normalize_name(company.name)
+        website_key = normalize_website(company.website)
+        if name_key in names or (website_key and website_key in websites):
+            duplicates += 1
+            errors.append({
+                "row": line_number,
+                "name": company.name,
+                "error": "Duplicate company (same name or website)",
+            })
+            continue
+
+        names.add(name_key)
+        if website_key:
+            websites.add(website_key)
+
+        values = company.model_dump()
+        db_company = Company(**values)
+        refresh_company_context(db_company)
+        values["context_block"] = db_company.context_block
+        values["context_hash"] = db_company.context_hash
+        batch.append(values)
+
+        if len(batch) >= settings.company_import_batch_size:
+            await _insert_batch(db, batch)
+            created += len(batch)
+            batch = []
+
+    if batch:
+        await _insert_batch(db, batch)
+        created += len(batch)
+
+    return {
+        "total_rows": total,
+        "created": created,
+        "duplicates": duplicates,
+        "failed": len(errors) - duplicates,
+        "errors": errors,
+    }
@@ -0,0 +1,292 @@
+"""
+Profile–company match ranking.
+
+Every company is a row of a sparse term matrix built from its tech stack,
+requirements and role. Ranking a profile is one sparse matrix–vector
+product against its skills, project stacks and past roles (IDF-weighted,
+so rare shared terms count for more than "python"), followed by a partial
+sort for the top K. That keeps a ranking over tens of thousands of
+companies in the low milliseconds.
+
+Company writes in this process update the index incrementally: changed
+rows go to a small delta that's scored alongside the base matrix and
+folded into it once it grows. Writes from other processes are picked up
+when the index reloads after MATCH_INDEX_REFRESH_SECONDS.
+"""
+import asyncio
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import select
+from app.config import get_settings
+from app.database import AsyncReadSessionLocal
+from app.models import Company
+
+settings = get_settings()
+
+_TERM_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_SHORT_TERMS = {"c", "r"}
+_STOPWORDS = frozenset({
+    "a", "an", "and", "any", "as", "at", "be", "by", "for", "from", "in", "is", "of", "on",
+    "or", "the", "to", "with", "we", "you", "our", "your", "will", "who", "plus", "etc",
+    "years", "year", "yrs", "experience", "experienced", "strong", "knowledge", "skills",
+    "ability", "working", "work", "familiarity", "understanding", "proficiency", "good",
+})
+
+# Delta rows (changed since the last build) beyond which the base matrix is rebuilt
+_MIN_COMPACT_ROWS = 256
+_COMPACT_RATIO = 0.1
+
+_MATCHED_TERMS_SHOWN = 8
+
+_COMPANY_COLUMNS = (Company.id, Company.tech_stack, Company.requirements, Company.job_role, Company.job_description)
+
+
+def extract_terms(text: str) -> list[str]:
+    """Lowercased tokens, keeping names like c++, c# and node.js intact."""
+    terms = []
+    for token in _TERM_RE.findall(text.lower()):
+        term = token.rstrip(".")
+        if term in _STOPWORDS or term.isdigit():
+            continue
+        if len(term) > 1 or term in _SHORT_TERMS:
+            terms.append(term)
+    return terms
+
+
+def _weighted_terms(fields: list[tuple[object, float]]) -> dict[str, float]:
+    weights: dict[str, float] = defaultdict(float)
+    for value, weight in fields:
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, str):
+                for term in extract_terms(item):
+                    weights[term] += weight
+    return weights
+
+
+def company_terms(company) -> dict[str, float]:
+    return _weighted_terms([
+        (company.tech_stack, 3.0),
+        (company.requirements, 2.0),
+        (company.job_role, 2.0),
+        (company.job_description, 0.5),
+    ])
+
+
+def profile_terms(profile) -> dict[str, float]:
+    projects = [p for p in profile.projects or [] if isinstance(p, dict)]
+    experience = [e for e in profile.experience or [] if isinstance(e, dict)]
+    return _weighted_terms([
+        (profile.skills, 3.0),
+        ([tech for p in projects for tech in p.get("tech_stack") or []], 2.0),
+        ([e.get("role") for e in experience], 1.5),
+    ])
+
+
+@dataclass
+class CompanyMatch:
+    company_id: int
+    score: float
+    matched_terms: list[str]
+
+
+class _IndexState:
+    """Vocabulary, document frequencies and the base matrix, swapped as a unit on reload."""
+
+    def __init__(self):
+        self.vocab: dict[str, int] = {}
+        self.terms: list[str] = []
+        self.df = np.zeros(0, dtype=np.int64)
+        self.base = csr_matrix((0, 0))
+        self.base_ids = np.zeros(0, dtype=np.int64)
+        self.base_rows: dict[int, int] = {}
+        self.delta: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self.removed: set[int] = set()  # Base rows superseded by a delta row or deleted
+
+    @property
+    def size(self) -> int:
+        return len(self.base_rows) - len(self.removed) + len(self.delta)
+
+    def vectorize(self, weights: dict[str, float], grow: bool) -> tuple[np.ndarray, np.ndarray]:
+        """Map term weights to (indices, L2-normalized values); unknown terms are added or dropped."""
+        pairs = []
+        for term, weight in weights.items():
+            index = self.vocab.get(term)
+            if index is None:
+                if not grow:
+                    continue
+                index = self.vocab[term] = len(self.terms)
+                self.terms.append(term)
+            pairs.append((index, weight))
+
+        if len(self.terms) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.terms) - len(self.df), dtype=np.int64)])
+        if not pairs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        pairs.sort()
+        indices = np.fromiter((i for i, _ in pairs), dtype=np.int32, count=len(pairs))
+        values = np.fromiter((w for _, w in pairs), dtype=np.float64, count=len(pairs))
+        return indices, values / np.linalg.norm(values)
+
+    def row(self, company_id: int) -> tuple[np.ndarray, np.ndarray] | None:
+        if company_id in self.delta:
+            return self.delta[company_id]
+        position = self.base_rows.get(company_id)
+        if position is None or company_id in self.removed:
+            return None
+        start, end = self.base.indptr[position], self.base.indptr[position + 1]
+        return self.base.indices[start:end], self.base.data[start:end]
+
+    def set_base(self, ids: list[int], rows: list[tuple[np.ndarray, np.ndarray]]) -> None:
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0)
+
+        self.base = csr_matrix((data, indices, indptr), shape=(len(rows), len(self.terms)))
+        self.base_ids = np.asarray(ids, dtype=np.int64)
+        self.base_rows = {company_id: position for position, company_id in enumerate(ids)}
+        self.delta.clear()
+        self.removed.clear()
+
+
+def _build_state(companies: list[tuple[int, dict[str, float]]]) -> _IndexState:
+    state = _IndexState()
+    ids, rows = [], []
+    for company_id, weights in companies:
+        indices, values = state.vectorize(weights, grow=True)
+        if len(indices):
+            ids.append(company_id)
+            rows.append((indices, values))
+    state.set_base(ids, rows)
+    state.df = np.bincount(state.base.indices, minlength=len(state.terms)).astype(np.int64)
+    return state
+
+
+class CompanyMatchIndex:
+    """In-memory ranking index over all companies, loaded lazily on first use."""
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._state = _IndexState()
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        # Writes made while a reload is in flight, replayed onto the new state
+        self._pending: list[tuple[int, dict[str, float] | None]] | None = None
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    async def ensure_loaded(self) -> None:
+        if self._fresh():
+            return
+        async with self._lock:
+            if self._fresh():
+                return
+            self._pending = []
+            try:
+                async with AsyncReadSessionLocal() as db:
+                    result = await db.stream(select(*_COMPANY_COLUMNS).execution_options(yield_per=1000))
+                    companies = [(row.id, company_terms(row)) async for row in result]
+                state = await asyncio.to_thread(_build_state, companies)
+                for company_id, weights in self._pending:
+                    self._apply(state, company_id, weights)
+                self._state = state
+                self._loaded_at = time.monotonic()
+            finally:
+                self._pending = None
+
+    def invalidate(self) -> None:
+        """Force a full reload on next use (e.g. after a bulk import)."""
+        self._loaded_at = None
+
+    def upsert(self, company: Company) -> None:
+        self._write(company.id, company_terms(company))
+
+    def remove(self, company_id: int) -> None:
+        self._write(company_id, None)
+
+    def _write(self, company_id: int, weights: dict[str, float] | None) -> None:
+        if self._pending is not None:
+            self._pending.append((company_id, weights))
+        if self._loaded_at is not None:
+            self._apply(self._state, company_id, weights)
+
+    def _apply(self, state: _IndexState, company_id: int, weights: dict[str, float] | None) -> None:
+        previous = state.row(company_id)
+        if previous is not None:
+            np.subtract.at(state.df, previous[0], 1)
+            state.delta.pop(company_id, None)
+            if company_id in state.base_rows:
+                state.removed.add(company_id)
+
+        if weights is not None:
+            indices, values = state.vectorize(weights, grow=True)
+            if len(indices):
+                state.delta[company_id] = (indices, values)
+                np.add.at(state.df, indices, 1)
+
+        if len(state.delta) + len(state.removed) > max(_MIN_COMPACT_ROWS, _COMPACT_RATIO * len(state.base_rows)):
+            self._compact(state)
+
+    @staticmethod
+    def _compact(state: _IndexState) -> None:
+        """Fold the delta into a rebuilt base matrix; term indices and frequencies are unchanged."""
+        ids = [
+            company_id for company_id in state.base_ids.tolist()
+            if company_id not in state.removed
+        ] + list(state.delta)
+        rows = [state.row(company_id) for company_id in ids]
+        state.set_base(ids, rows)
+
+    def rank(self, profile, limit: int) -> list[CompanyMatch]:
+        """Top companies for a profile, best first; companies sharing no terms are left out."""
+        state = self._state
+        q_indices, q_values = state.vectorize(profile_terms(profile), grow=False)
+        if not len(q_indices) or not state.size:
+            return []
+
+        idf = np.log((1 + state.size) / (1 + state.df[q_indices])) + 1.0
+        weighted = q_values * idf
+        query = np.zeros(len(state.terms))
+        query[q_indices] = weighted * idf / np.linalg.norm(weighted)
+
+        base_scores = state.base @ query[: state.base.shape[1]]
+        if state.removed:
+            base_scores[[state.base_rows[company_id] for company_id in state.removed]] = 0.0
+        delta_ids = np.fromiter(state.delta, dtype=np.int64, count=len(state.delta))
+        delta_scores = np.fromiter(
+            (values @ query[indices] for indices, values in state.delta.values()),
+            dtype=np.float64,
+            count=len(state.delta),
+        )
+
+        ids = np.concatenate([state.base_ids, delta_ids])
+        scores = np.concatenate([base_scores, delta_scores])
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        matches = []
+        for position in top:
+            if scores[position] <= 0:
+                break
+            company_id = int(ids[position])
+            indices, values = state.row(company_id)
+            contributions = values * query[indices]
+            shared = np.nonzero(contributions)[0]
+            shared = shared[np.argsort(-contributions[shared])][:_MATCHED_TERMS_SHOWN]
+            matches.append(CompanyMatch(
+                company_id=company_id,
+                score=round(float(scores[position]), 4),
+                matched_terms=[state.terms[indices[i]] for i in shared],
+            ))
+        return matches
+
+
+company_match_index = CompanyMatchIndex(settings.match_index_refresh_seconds)
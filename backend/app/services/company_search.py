@@ -0,0 +1,79 @@
+"""
+Company search backed by the companies_fts FTS5 index (migration 0003).
+
+User input is reduced to word tokens and each one is quoted, so FTS5
+query syntax in the input can't cause errors; tokens are ANDed, and the
+last one can match as a prefix for search-as-you-type. Results are
+ranked by bm25 with matches in the name and role weighted highest.
+"""
+import re
+from sqlalchemy import Select, column, func, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Company
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 weight per indexed column, in migration 0003's column order:
+# name, industry, location, description, job_role, job_description, tech_stack, requirements
+_BM25_WEIGHTS = (10.0, 2.0, 1.0, 3.0, 5.0, 2.0, 4.0, 2.0)
+
+_fts = table("companies_fts", column("rowid"))
+_fts_table = literal_column("companies_fts")
+
+
+def build_match_expression(text: str, prefix: bool = True) -> str | None:
+    """Turn free text into an FTS5 MATCH expression, or None if it has no words."""
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _apply_filters(query: Select, industry: str | None, location: str | None) -> Select:
+    if industry:
+        query = query.where(func.lower(Company.industry) == industry.lower())
+    if location:
+        query = query.where(Company.location.ilike(f"%{location}%"))
+    return query
+
+
+async def search_companies(
+    db: AsyncSession,
+    text: str | None,
+    industry: str | None = None,
+    location: str | None = None,
+    prefix: bool = True,
+    limit: int = 20,
+) -> list[Company]:
+    """
+    Search companies by text, optionally narrowed by industry (exact,
+    case-insensitive) and location (substring).
+
+    Without search words, companies matching the filters are returned in
+    creation order.
+    """
+    match = build_match_expression(text or "", prefix)
+
+    if match is None:
+        query = _apply_filters(select(Company), industry, location).order_by(Company.id)
+    elif db.bind.dialect.name == "sqlite":
+        query = (
+            select(Company)
+            .join(_fts, _fts.c.rowid == Company.id)
+            .where(_fts_table.op("MATCH")(match))
+            .order_by(func.bm25(_fts_table, *_BM25_WEIGHTS))
+        )
+        query = _apply_filters(query, industry, location)
+    else:
+        # No FTS index outside SQLite: every word must appear in the name or description
+        query = select(Company)
+        for token in _TOKEN_RE.findall(text):
+            pattern = f"%{token}%"
+            query = query.where(or_(Company.name.ilike(pattern), Company.description.ilike(pattern)))
+        query = _apply_filters(query, industry, location).order_by(Company.name)
+
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
@@ -0,0 +1,143 @@
+import hashlib
+from app.models import UserProfile, Company
+
+# Bump whenever the rendering below changes so stored blocks are re-rendered
+CONTEXT_FORMAT_VERSION = 1
+
+
+def render_user_profile(profile: UserProfile) -> str:
+    """Render a user profile into the context block used in prompts."""
+    profile_parts = [
+        f"Name: {profile.name}",
+        f"Email: {profile.email}",
+    ]
+
+    if profile.location:
+        profile_parts.append(f"Location: {profile.location}")
+
+    if profile.bio:
+        profile_parts.append(f"About: {profile.bio}")
+
+    if profile.skills:
+        profile_parts.append(f"Skills: {', '.join(profile.skills)}")
+
+    if profile.experience:
+        exp_list = []
+        for exp in profile.experience:
+            exp_str = f"- {exp.get('role', '')} at {exp.get('company', '')} ({exp.get('duration', '')})"
+            if exp.get('description'):
+                exp_str += f": {exp.get('description')}"
+            exp_list.append(exp_str)
+        profile_parts.append(f"Experience:\n" + "\n".join(exp_list))
+
+    if profile.projects:
+        proj_list = []
+        for proj in profile.projects:
+            proj_str = f"- {proj.get('name', '')}: {proj.get('description', '')}"
+            if proj.get('tech_stack'):
+                proj_str += f" (Tech: {', '.join(proj.get('tech_stack', []))})"
+            if proj.get('link'):
+                proj_str += f" - {proj.get('link')}"
+            proj_list.append(proj_str)
+        profile_parts.append(f"Projects:\n" + "\n".join(proj_list))
+
+    if profile.education:
+        edu_list = []
+        for edu in profile.education:
+            edu_str = f"- {edu.get('degree', '')} from {edu.get('institution', '')} ({edu.get('year', '')})"
+            edu_list.append(edu_str)
+        profile_parts.append(f"Education:\n" + "\n".join(edu_list))
+
+    if profile.achievements:
+        profile_parts.append(f"Achievements: {', '.join(profile.achievements)}")
+
+    if profile.links:
+        links_list = [f"{key}: {value}" for key, value in profile.links.items() if value]
+        if links_list:
+            profile_parts.append(f"Links:\n" + "\n".join([f"- {link}" for link in links_list]))
+
+    return "\n\n".join(profile_parts)
+
+
+def render_company(company: Company) -> str:
+    """Render company information into the context block used in prompts."""
+    company_parts = [
+        f"Company: {company.name}",
+    ]
+
+    if company.founder_name:
+        company_parts.append(f"Founded by: {company.founder_name}")
+
+    company_parts.append(f"What they do: {company.description}")
+
+    if company.industry:
+        company_parts.append(f"Industry: {company.industry}")
+
+    if company.size:
+        company_parts.append(f"Size: {company.size}")
+
+    if company.location:
+        company_parts.append(f"Location: {company.location}")
+
+    if company.values:
+        company_parts.append(f"Company Values: {', '.join(company.values)}")
+
+    if company.tech_stack:
+        company_parts.append(f"Tech Stack: {', '.join(company.tech_stack)}")
+
+    if company.job_role:
+        company_parts.append(f"Role you're applying for: {company.job_role}")
+
+    if company.job_description:
+        company_parts.append(f"Role Description: {company.job_description}")
+
+    if company.requirements:
+        company_parts.append(f"Requirements:\n" + "\n".join([f"- {req}" for req in company.requirements]))
+
+    if company.culture_notes:
+        company_parts.append(f"Culture Notes: {company.culture_notes}")
+
+    if company.recent_news:
+        company_parts.append(f"Recent News: {company.recent_news}")
+
+    return "\n\n".join(company_parts)
+
+
+def context_hash(block: str) -> str:
+    """Hash a rendered block, tagged with the format version that produced it."""
+    digest = hashlib.sha256(block.encode("utf-8")).hexdigest()
+    return f"v{CONTEXT_FORMAT_VERSION}:{digest}"
+
+
+def is_current(entity: UserProfile | Company) -> bool:
+    """Whether the stored context block was rendered by the current format."""
+    return bool(entity.context_block) and bool(entity.context_hash) and \
+        entity.context_hash.startswith(f"v{CONTEXT_FORMAT_VERSION}:")
+
+
+def refresh_profile_context(profile: UserProfile) -> None:
+    """Materialize the prompt context block on a profile before it's saved."""
+    profile.context_block = render_user_profile(profile)
+    profile.context_hash = context_hash(profile.context_block)
+
+
+def refresh_company_context(company: Company) -> None:
+    """Materialize the prompt context block on a company before it's saved."""
+    company.context_block = render_company(company)
+    company.context_hash = context_hash(company.context_block)
+
+
+def get_profile_context(profile: UserProfile) -> tuple[str, str]:
+    """Return (block, hash) for a profile, rendering on the fly if not materialized."""
+    if is_current(profile):
+        return profile.context_block, profile.context_hash
+    block = render_user_profile(profile)
+    return block, context_hash(block)
+
+
+def get_company_context(company: Company) -> tuple[str, str]:
+    """Return (block, hash) for a company, rendering on the fly if not materialized."""
+    if is_current(company):
+        return company.context_block, company.context_hash
+    block = render_company(company)
+    return block, context_hash(block)
@@ -0,0 +1,205 @@
+"""
+Few-shot example retrieval.
+
+Examples are embedded locally as hashed unigram + bigram vectors of their
+title, notes and content (no vocabulary to maintain, so single examples
+can be added or removed without re-fitting anything). For a generation,
+each example of the requested type is scored by cosine similarity to the
+company's role, stack and description (IDF-weighted on the query side)
+blended with its quality rating, so the examples sent are the ones
+closest to the target rather than the same best-rated few every time.
+
+The index is loaded at startup and served from memory. Example writes
+in this process update it directly; every write also bumps the
+"examples" cache version row, and each worker checks that row at most
+every EXAMPLE_INDEX_VERSION_CHECK_SECONDS, reloading when another worker
+has changed the set.
+"""
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import select
+from app.config import get_settings
+from app.database import AsyncReadSessionLocal
+from app.models import Company
+from app.models.example import Example
+from app.services.cache_versions import EXAMPLES, get_version
+from app.services.company_matcher import extract_terms
+
+settings = get_settings()
+
+_N_FEATURES = 1 << 18
+
+
+def _hash_vector(fields: list[tuple[object, float]]) -> tuple[np.ndarray, np.ndarray]:
+    """Hash the terms and adjacent-term bigrams of weighted text fields into an L2-normalized sparse vector."""
+    counts: dict[int, float] = {}
+    for value, weight in fields:
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if not isinstance(item, str):
+                continue
+            terms = extract_terms(item)
+            grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+            for gram in grams:
+                bucket = zlib.crc32(gram.encode()) & (_N_FEATURES - 1)
+                counts[bucket] = counts.get(bucket, 0.0) + weight
+
+    if not counts:
+        return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+    indices = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+    # Sublinear term frequency so a long example doesn't win on repetition
+    values = np.log1p(np.fromiter((counts[i] for i in indices), dtype=np.float64, count=len(indices)))
+    return indices, values / np.linalg.norm(values)
+
+
+def example_vector(example) -> tuple[np.ndarray, np.ndarray]:
+    return _hash_vector([(example.title, 2.0), (example.notes, 1.5), (example.content, 1.0)])
+
+
+def company_query_vector(company: Company) -> tuple[np.ndarray, np.ndarray]:
+    return _hash_vector([
+        (company.job_role, 3.0),
+        (company.industry, 2.0),
+        (company.tech_stack, 2.0),
+        (company.requirements, 1.0),
+        (company.job_description, 1.0),
+        (company.description, 1.0),
+    ])
+
+
+@dataclass
+class _Entry:
+    generation_type: str
+    quality_rating: float
+    content: str
+    indices: np.ndarray
+    values: np.ndarray
+
+
+@dataclass
+class _TypeMatrix:
+    contents: list[str]
+    ratings: np.ndarray
+    matrix: csr_matrix
+
+
+def _type_value(generation_type) -> str:
+    return getattr(generation_type, "value", generation_type)
+
+
+class ExampleIndex:
+    """In-memory similarity index over examples, one matrix per generation type."""
+
+    def __init__(self, version_check_seconds: float):
+        self.version_check_seconds = version_check_seconds
+        self._entries: dict[int, _Entry] = {}
+        self._df = np.zeros(_N_FEATURES, dtype=np.int32)
+        self._matrices: dict[str, _TypeMatrix] = {}  # Built on demand, dropped when a type changes
+        self._version: int | None = None  # Cache version the entries reflect; None until loaded
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _checked_recently(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.version_check_seconds
+
+    async def ensure_loaded(self) -> None:
+        """Load the examples, or reload them if another worker has changed them since."""
+        if self._checked_recently():
+            return
+        async with self._lock:
+            if self._checked_recently():
+                return
+            async with AsyncReadSessionLocal() as db:
+                # Read the version first: a write landing in between only costs an extra reload
+                version = await get_version(db, EXAMPLES)
+                if version != self._version:
+                    result = await db.execute(select(Example))
+                    self._load(result.scalars().all(), version)
+            self._checked_at = time.monotonic()
+
+    def _load(self, examples: list[Example], version: int) -> None:
+        self._entries.clear()
+        self._df[:] = 0
+        self._matrices.clear()
+        for example in examples:
+            self._add(example)
+        self._version = version
+
+    def upsert(self, example: Example, version: int) -> None:
+        """Apply a committed create/update; version is what the write bumped the counter to."""
+        if self._version is None:
+            return
+        self._discard(example.id)
+        self._add(example)
+        self._advance(version)
+
+    def remove(self, example_id: int, version: int) -> None:
+        if self._version is None:
+            return
+        self._discard(example_id)
+        self._advance(version)
+
+    def _advance(self, version: int) -> None:
+        # Only our own write happened since the last load; otherwise let the next check reload
+        if version == self._version + 1:
+            self._version = version
+
+    def _add(self, example: Example) -> None:
+        indices, values = example_vector(example)
+        entry = _Entry(_type_value(example.generation_type), example.quality_rating, example.content, indices, values)
+        self._entries[example.id] = entry
+        self._df[indices] += 1
+        self._matrices.pop(entry.generation_type, None)
+
+    def _discard(self, example_id: int) -> None:
+        entry = self._entries.pop(example_id, None)
+        if entry is not None:
+            self._df[entry.indices] -= 1
+            self._matrices.pop(entry.generation_type, None)
+
+    def _matrix(self, generation_type: str) -> _TypeMatrix:
+        matrix = self._matrices.get(generation_type)
+        if matrix is None:
+            # Best-rated first, so similarity ties fall back to the rating order
+            entries = sorted(
+                (e for e in self._entries.values() if e.generation_type == generation_type),
+                key=lambda e: -e.quality_rating,
+            )
+            indptr = np.zeros(len(entries) + 1, dtype=np.int64)
+            np.cumsum([len(e.indices) for e in entries], out=indptr[1:])
+            data = np.concatenate([e.values for e in entries]) if entries else np.zeros(0)
+            indices = np.concatenate([e.indices for e in entries]) if entries else np.zeros(0, dtype=np.int32)
+            matrix = self._matrices[generation_type] = _TypeMatrix(
+                contents=[e.content for e in entries],
+                ratings=np.array([e.quality_rating for e in entries], dtype=np.float64),
+                matrix=csr_matrix((data, indices, indptr), shape=(len(entries), _N_FEATURES)),
+            )
+        return matrix
+
+    def select(self, generation_type, company: Company, limit: int) -> list[str]:
+        """Best examples of a type for a company: similarity blended with quality rating."""
+        candidates = self._matrix(_type_value(generation_type))
+        if not candidates.contents:
+            return []
+
+        similarity = np.zeros(len(candidates.contents))
+        q_indices, q_values = company_query_vector(company)
+        if len(q_indices):
+            idf = np.log((1 + len(self._entries)) / (1 + self._df[q_indices])) + 1.0
+            query = q_values * idf
+            query /= np.linalg.norm(query)
+            similarity = candidates.matrix[:, q_indices] @ query
+
+        weight = settings.example_similarity_weight
+        # Ratings run 1-5; scale to 0-1 to blend with cosine similarity
+        scores = weight * similarity + (1 - weight) * (candidates.ratings - 1.0) / 4.0
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [candidates.contents[i] for i in top]
+
+
+example_index = ExampleIndex(settings.example_index_version_check_seconds)
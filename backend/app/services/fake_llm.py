@@ -0,0 +1,194 @@
+"""
+In-process stand-in for the Gemini chat model.
+
+Selected with LLM_PROVIDER=fake. Replies are canned per prompt kind (plan,
+message, refinement, resume JSON) or taken from a user-supplied responses
+file, and are delivered with a configurable time-to-first-token, token
+rate and error rate so generation and parsing paths can be load-tested
+without an API key or network.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_FAKE_RESUME = {
+    "name": "Alex Rivera",
+    "email": "alex.rivera@example.com",
+    "phone": "+1-555-0100",
+    "location": "Austin, TX",
+    "bio": "Backend engineer with experience in Python, FastAPI and cloud infrastructure",
+    "skills": ["Python", "FastAPI", "PostgreSQL", "Redis", "Docker", "AWS"],
+    "experience": [
+        {
+            "company": "Acme Analytics",
+            "role": "Backend Engineering Intern",
+            "duration": "May 2025 - Aug 2025",
+            "description": "Built a FastAPI ingestion service handling 10,000+ events per minute and cut p95 latency by 30% with Redis caching.",
+        }
+    ],
+    "projects": [
+        {
+            "name": "Gitlytics",
+            "description": "GitHub analytics dashboard that summarizes repository activity for small teams.",
+            "tech_stack": ["Python", "Flask", "React", "PostgreSQL"],
+            "link": "https://github.com/example/gitlytics",
+        }
+    ],
+    "education": [
+        {
+            "institution": "University of Texas at Austin",
+            "degree": "Bachelor of Science, Computer Science",
+            "year": "Aug 2023 - Present",
+            "gpa": "3.8/4.0",
+        }
+    ],
+    "links": {
+        "github": "https://github.com/example",
+        "linkedin": "https://linkedin.com/in/example",
+        "portfolio": None,
+        "twitter": None,
+        "other": {},
+    },
+    "resume_url": None,
+    "achievements": ["Winner, HackTX 2024"],
+    "certifications": [{"name": "AWS Cloud Practitioner", "issuer": "Amazon Web Services", "date": "2024"}],
+    "languages": ["English", "Spanish"],
+    "interests": "Climbing, open source",
+}
+
+_FAKE_PLAN = """- Lead with {company}'s product and why it caught the applicant's eye
+- Connect the applicant's most relevant project to the team's tech stack
+- Mention one concrete metric from past experience
+- Keep the tone {tone} and the ask small: a 15-minute call"""
+
+_FAKE_MESSAGE = """Hey there,
+
+Been following what {company} is building for a while now - it's genuinely one of the more interesting things I've seen this year.
+
+I've been working on backend systems for a little over two years. Recently built a FastAPI service that handled a pretty big jump in traffic without falling over, which was no small feat.
+
+Any chance we could hop on a quick call this week?
+
+Thanks!"""
+
+_FAKE_REFINEMENT = "Recently built a FastAPI service that handled a big jump in traffic - turned out pretty well."
+
+
+class FakeLLMError(RuntimeError):
+    """Simulated provider failure injected by the fake model."""
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that returns canned replies with a simulated latency profile."""
+
+    time_to_first_token: float = 0.3
+    tokens_per_second: float = 80.0
+    error_rate: float = 0.0
+    responses_path: str | None = None
+    seed: int | None = None
+
+    _rng: random.Random | None = None
+    _custom_responses: list[dict] | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _load_custom_responses(self) -> list[dict]:
+        """Load [{"match": "substring", "response": "text"}, ...] from responses_path."""
+        if self._custom_responses is None:
+            self._custom_responses = []
+            if self.responses_path:
+                with open(self.responses_path, encoding="utf-8") as f:
+                    self._custom_responses = json.load(f)
+        return self._custom_responses
+
+    def _reply_for(self, messages: list[BaseMessage]) -> str:
+        """Pick a canned reply based on what kind of prompt this is."""
+        prompt = "\n".join(str(message.content) for message in messages)
+
+        for entry in self._load_custom_responses():
+            if entry["match"] in prompt:
+                return entry["response"]
+
+        if self._random().random() < self.error_rate:
+            raise FakeLLMError("Simulated provider error: 429 RESOURCE_EXHAUSTED")
+
+        company_match = re.search(r"(?:role at|to) (.+?)\.\n", prompt)
+        tone_match = re.search(r"\(Target: (.+?)\)", prompt)
+        values = {
+            "company": company_match.group(1) if company_match else "your team",
+            "tone": tone_match.group(1) if tone_match else "professional",
+        }
+
+        if "JSON" in prompt and "resume" in prompt.lower():
+            return json.dumps(_FAKE_RESUME, indent=2)
+        if "strategic plan" in prompt or "strategic outline" in prompt:
+            return _FAKE_PLAN.format(**values)
+        if "SECTION TO REPLACE" in prompt:
+            return _FAKE_REFINEMENT
+        return _FAKE_MESSAGE.format(**values)
+
+    @staticmethod
+    def _tokens(text: str) -> list[str]:
+        """Split text into word-ish tokens that join back to the original."""
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply_for(messages)
+        time.sleep(self.time_to_first_token + len(self._tokens(reply)) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply_for(messages)
+        await asyncio.sleep(self.time_to_first_token + len(self._tokens(reply)) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply_for(messages)
+        time.sleep(self.time_to_first_token)
+        for token in self._tokens(reply):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            time.sleep(1 / self.tokens_per_second)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        reply = self._reply_for(messages)
+        await asyncio.sleep(self.time_to_first_token)
+        for token in self._tokens(reply):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            await asyncio.sleep(1 / self.tokens_per_second)
@@ -0,0 +1,403 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, and_, or_, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import (
+    UserProfile,
+    Company,
+    GenerationJob,
+    GenerationTask,
+    JobStatus,
+    TaskStatus,
+)
+from app.schemas.generation import (
+    BulkGenerationRequest,
+    CacheMode,
+    GenerationResponse,
+    GenerationType,
+)
+from app.services.ai_service import ai_service
+from app.services.loaders import load_companies
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_bulk_job(db: AsyncSession, request: BulkGenerationRequest) -> GenerationJob:
+    """
+    Persist a bulk request as a job with one task per company.
+
+    Companies that don't exist are recorded as failed tasks straight away so
+    the job's results line up with the original request.
+    """
+    companies_by_id, _ = await load_companies(db, request.company_ids)
+
+    job = GenerationJob(
+        user_profile_id=request.user_profile_id,
+        generation_type=request.generation_type.value,
+        tone=request.tone,
+        max_length=request.max_length,
+        additional_context=request.additional_context,
+        cache_mode=request.cache.value,
+        plan_model=request.plan_model,
+        write_model=request.write_model,
+        status=JobStatus.PENDING.value,
+        total_tasks=len(request.company_ids),
+    )
+    db.add(job)
+    await db.flush()
+
+    for position, company_id in enumerate(request.company_ids):
+        task = GenerationTask(
+            job_id=job.id,
+            company_id=company_id,
+            position=position,
+            status=TaskStatus.PENDING.value,
+        )
+        if company_id not in companies_by_id:
+            task.status = TaskStatus.FAILED.value
+            task.error = f"Company with ID {company_id} not found"
+        db.add(task)
+
+    await db.commit()
+    await _finish_job_if_done(db, job.id)
+    await db.refresh(job)
+    return job
+
+
+async def get_job_progress(db: AsyncSession, job_id: int) -> dict | None:
+    """Summarize a job's status, counts and finished results."""
+    result = await db.execute(select(GenerationJob).where(GenerationJob.id == job_id))
+    job = result.scalar_one_or_none()
+
+    if not job:
+        return None
+
+    tasks_result = await db.execute(
+        select(GenerationTask)
+        .where(GenerationTask.job_id == job_id)
+        .order_by(GenerationTask.position)
+    )
+    tasks = tasks_result.scalars().all()
+
+    results = []
+    failed = []
+    pending = 0
+
+    for task in tasks:
+        if task.status == TaskStatus.SUCCEEDED.value:
+            results.append(task.result)
+        elif task.status == TaskStatus.FAILED.value:
+            failed.append({
+                "company_id": task.company_id,
+                "error": task.error,
+            })
+        else:
+            pending += 1
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "user_profile_id": job.user_profile_id,
+        "generation_type": job.generation_type,
+        "total_tasks": job.total_tasks,
+        "pending": pending,
+        "succeeded": len(results),
+        "failed_count": len(failed),
+        "results": results,
+        "failed": failed,
+        "created_at": job.created_at,
+        "completed_at": job.completed_at,
+    }
+
+
+async def _finish_job_if_done(db: AsyncSession, job_id: int) -> None:
+    """Mark a job completed once none of its tasks are pending or running."""
+    unfinished = exists().where(
+        GenerationTask.job_id == job_id,
+        GenerationTask.status.in_([TaskStatus.PENDING.value, TaskStatus.RUNNING.value]),
+    )
+    await db.execute(
+        update(GenerationJob)
+        .where(
+            GenerationJob.id == job_id,
+            GenerationJob.status != JobStatus.COMPLETED.value,
+            ~unfinished,
+        )
+        .values(status=JobStatus.COMPLETED.value, completed_at=_utcnow())
+    )
+    await db.commit()
+
+
+class JobWorker:
+    """
+    Processes queued generation tasks.
+
+    Tasks are claimed with a lease that's renewed while they run; if a worker
+    dies mid-task the lease lapses and another worker (or this one after a
+    restart) picks the task up again, until it has used up its attempts.
+    Several workers can share the same database, in-process or via
+    `python -m app.worker`.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        lease_seconds: int | None = None,
+        max_attempts: int | None = None,
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self.poll_interval = poll_interval or settings.job_poll_interval_seconds
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self._slots: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    async def _fail_exhausted_tasks(self, db: AsyncSession, now: datetime) -> None:
+        """Fail tasks whose lease lapsed on their last allowed attempt instead of running them again."""
+        exhausted = and_(
+            GenerationTask.status == TaskStatus.RUNNING.value,
+            GenerationTask.lease_expires_at < now,
+            GenerationTask.attempts >= self.max_attempts,
+        )
+        result = await db.execute(select(GenerationTask.job_id).where(exhausted).distinct())
+        job_ids = result.scalars().all()
+        if not job_ids:
+            return
+
+        await db.execute(
+            update(GenerationTask)
+            .where(exhausted)
+            .values(
+                status=TaskStatus.FAILED.value,
+                error=f"Task did not finish within {self.max_attempts} attempts",
+                lease_expires_at=None,
+            )
+        )
+        await db.commit()
+        for job_id in job_ids:
+            await _finish_job_if_done(db, job_id)
+
+    async def _claim_task(self, db: AsyncSession, worker_id: str) -> GenerationTask | None:
+        """Claim the oldest runnable task, or return None if there's nothing to do."""
+        now = _utcnow()
+        await self._fail_exhausted_tasks(db, now)
+
+        claimable = or_(
+            GenerationTask.status == TaskStatus.PENDING.value,
+            and_(
+                GenerationTask.status == TaskStatus.RUNNING.value,
+                GenerationTask.lease_expires_at < now,
+                GenerationTask.attempts < self.max_attempts,
+            ),
+        )
+
+        candidates = await db.execute(
+            select(GenerationTask.id)
+            .where(claimable)
+            .order_by(GenerationTask.job_id, GenerationTask.position)
+            .limit(self.concurrency)
+        )
+
+        claimed_id = None
+        for task_id in candidates.scalars().all():
+            # Conditional update so two workers can't both win the same task
+            claimed = await db.execute(
+                update(GenerationTask)
+                .where(GenerationTask.id == task_id, claimable)
+                .values(
+                    status=TaskStatus.RUNNING.value,
+                    worker_id=worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=GenerationTask.attempts + 1,
+                )
+            )
+            if claimed.rowcount == 1:
+                claimed_id = task_id
+                break
+        await db.commit()
+
+        if claimed_id is None:
+            return None
+        result = await db.execute(select(GenerationTask).where(GenerationTask.id == claimed_id))
+        return result.scalar_one()
+
+    async def _renew_lease(self, task_id: int, worker_id: str) -> None:
+        """Keep extending a running task's lease until cancelled or the lease is lost."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    renewed = await db.execute(
+                        update(GenerationTask)
+                        .where(
+                            GenerationTask.id == task_id,
+                            GenerationTask.worker_id == worker_id,
+                            GenerationTask.status == TaskStatus.RUNNING.value,
+                        )
+                        .values(lease_expires_at=_utcnow() + timedelta(seconds=self.lease_seconds))
+                    )
+                    await db.commit()
+            except Exception as e:
+                # A missed renewal is retried at the next interval, well before the lease lapses
+                logger.warning("Could not renew the lease on generation task %s: %s", task_id, e)
+                continue
+
+            if renewed.rowcount == 0:
+                logger.warning("Worker %s lost the lease on generation task %s", worker_id, task_id)
+                return
+
+    async def _run_task(self, db: AsyncSession, task: GenerationTask, worker_id: str) -> None:
+        """Generate content for one claimed task and record the outcome."""
+        job_result = await db.execute(
+            select(GenerationJob).where(GenerationJob.id == task.job_id)
+        )
+        job = job_result.scalar_one()
+
+        await db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job.id, GenerationJob.status == JobStatus.PENDING.value)
+            .values(status=JobStatus.RUNNING.value)
+        )
+        # Commit before the LLM call so we don't hold SQLite's write lock through it
+        await db.commit()
+
+        heartbeat = asyncio.create_task(self._renew_lease(task.id, worker_id))
+        try:
+            values = await self._generate(db, job, task)
+        finally:
+            heartbeat.cancel()
+
+        # Only record the outcome if we still hold the lease
+        await db.execute(
+            update(GenerationTask)
+            .where(GenerationTask.id == task.id, GenerationTask.worker_id == worker_id)
+            .values(**values)
+        )
+        await db.commit()
+        await _finish_job_if_done(db, job.id)
+
+    async def _generate(self, db: AsyncSession, job: GenerationJob, task: GenerationTask) -> dict:
+        """Run one task's generation and return the column values recording its outcome."""
+        try:
+            profile_result = await db.execute(
+                select(UserProfile).where(UserProfile.id == job.user_profile_id)
+            )
+            profile = profile_result.scalar_one_or_none()
+            if not profile:
+                raise LookupError(f"User profile with ID {job.user_profile_id} not found")
+
+            company_result = await db.execute(
+                select(Company).where(Company.id == task.company_id)
+            )
+            company = company_result.scalar_one_or_none()
+            if not company:
+                raise LookupError(f"Company with ID {task.company_id} not found")
+
+            generation_type = GenerationType(job.generation_type)
+            generated_content, chain_of_thought, cached = await ai_service.generate_content(
+                profile=profile,
+                company=company,
+                generation_type=generation_type,
+                tone=job.tone,
+                max_length=job.max_length,
+                additional_context=job.additional_context,
+                cache_mode=CacheMode(job.cache_mode),
+                plan_model=job.plan_model,
+                write_model=job.write_model,
+            )
+
+            response = GenerationResponse(
+                generated_content=generated_content,
+                generation_type=generation_type,
+                user_profile_id=job.user_profile_id,
+                company_id=company.id,
+                chain_of_thought=chain_of_thought,
+                metadata={
+                    "company_name": company.name,
+                    "user_name": profile.name,
+                    "tone": job.tone,
+                    "max_length": job.max_length,
+                    "cached": cached,
+                }
+            )
+            return {
+                "status": TaskStatus.SUCCEEDED.value,
+                "result": response.model_dump(mode="json"),
+                "error": None,
+                "lease_expires_at": None,
+            }
+
+        except LookupError as e:
+            # Missing rows won't appear on retry
+            return {
+                "status": TaskStatus.FAILED.value,
+                "error": str(e),
+                "lease_expires_at": None,
+            }
+
+        except Exception as e:
+            retry = task.attempts < self.max_attempts
+            logger.warning("Generation task %s failed (attempt %s): %s", task.id, task.attempts, e)
+            return {
+                "status": TaskStatus.PENDING.value if retry else TaskStatus.FAILED.value,
+                "error": str(e),
+                "lease_expires_at": None,
+            }
+
+    async def _slot_loop(self, slot: int) -> None:
+        """Claim and run tasks one at a time until stopped."""
+        # Each slot holds its leases under its own ID, so the lease checks tell slots apart
+        worker_id = f"{self.worker_id}/{slot}"
+        while not self._stopping.is_set():
+            try:
+                async with AsyncSessionLocal() as db:
+                    task = await self._claim_task(db, worker_id)
+                    if task:
+                        await self._run_task(db, task, worker_id)
+                        continue
+            except Exception:
+                logger.exception("Job worker %s hit an unexpected error", worker_id)
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the worker's slots on the running event loop."""
+        self._stopping.clear()
+        self._slots = [
+            asyncio.create_task(self._slot_loop(slot)) for slot in range(self.concurrency)
+        ]
+        logger.info("Job worker %s started with %s slots", self.worker_id, self.concurrency)
+
+    async def stop(self) -> None:
+        """Stop claiming new tasks and wait for in-flight ones to finish."""
+        self._stopping.set()
+        await asyncio.gather(*self._slots, return_exceptions=True)
+        self._slots = []
+
+    async def run_forever(self) -> None:
+        """Run until cancelled; used by the standalone worker process."""
+        self.start()
+        try:
+            await asyncio.gather(*self._slots)
+        finally:
+            await self.stop()
+
+
+# Worker started inside the API process when JOB_WORKER_ENABLED is set
+job_worker = JobWorker()
@@ -0,0 +1,225 @@
+"""
+Deterministic LaTeX-to-text conversion for resume sources.
+
+Strips the preamble, comments and layout commands, and expands the macros
+common resume templates use into plain structured text, so the parse
+prompt doesn't have to spend tokens teaching the model to ignore LaTeX.
+"""
+import re
+from dataclasses import dataclass
+from app.services.tokens import estimate_tokens
+
+# Commands whose arguments are rendered into structured text
+_MACROS = {
+    "resumeSubheading": (4, lambda a: f"\n{a[0]} | {a[1]}\n{a[2]} | {a[3]}\n"),
+    "resumeSubSubheading": (2, lambda a: f"\n{a[0]} | {a[1]}\n"),
+    "resumeProjectHeading": (2, lambda a: f"\n{a[0]} | {a[1]}\n"),
+    "resumeItem": (1, lambda a: f"\n- {a[0]}"),
+    "resumeSubItem": (2, lambda a: f"\n- {a[0]}: {a[1]}"),
+    "href": (2, lambda a: a[1] if a[1].strip() == a[0].strip() else f"{a[1]} ({a[0]})"),
+    "url": (1, lambda a: a[0]),
+    "section": (1, lambda a: f"\n\n## {a[0]}\n"),
+    "section*": (1, lambda a: f"\n\n## {a[0]}\n"),
+    "subsection": (1, lambda a: f"\n\n### {a[0]}\n"),
+    "subsection*": (1, lambda a: f"\n\n### {a[0]}\n"),
+}
+
+# Commands dropped together with their arguments
+_DROP_WITH_ARGS = {
+    "vspace": 1, "vspace*": 1, "hspace": 1, "hspace*": 1, "setlength": 2,
+    "addtolength": 2, "label": 1, "fontsize": 2, "color": 1, "pagestyle": 1,
+    "thispagestyle": 1, "titleformat": 5, "input": 1, "include": 1,
+}
+
+# Extra arguments consumed by \begin{env} beyond the environment name
+_ENV_ARGS = {"tabular": 1, "tabular*": 2, "tabularx": 2, "minipage": 1, "multicols": 1}
+
+_ESCAPES = {"&": "&", "%": "%", "$": "$", "#": "#", "_": "_", "{": "{", "}": "}", " ": " ", ",": " "}
+
+_COMMENT_RE = re.compile(r"(?<!\\)%.*$", re.MULTILINE)
+_DOCUMENT_RE = re.compile(r"\\begin\{document\}(.*?)(?:\\end\{document\}|\Z)", re.DOTALL)
+_LATEX_COMMAND_RE = re.compile(r"\\[a-zA-Z]+")
+# En/em dash ligatures (2020--2022, "A --- B"); only between digits or spaces so
+# option names and URLs that contain "--" survive
+_DASH_RE = re.compile(r"(?<=[\d\s])-{2,3}(?=[\d\s])")
+
+
+@dataclass
+class NormalizedResume:
+    """Result of normalizing resume source text."""
+    text: str
+    was_latex: bool
+    original_tokens: int
+    normalized_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.normalized_tokens
+
+
+def looks_like_latex(text: str) -> bool:
+    """Whether text is LaTeX source rather than already-extracted plain text."""
+    return "\\begin{document}" in text or len(_LATEX_COMMAND_RE.findall(text)) >= 5
+
+
+class _Expander:
+    """Single-pass scanner that expands commands and unwraps brace groups."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.pos = 0
+
+    def _skip_whitespace(self) -> None:
+        while self.pos < len(self.source) and self.source[self.pos] in " \t\n":
+            self.pos += 1
+
+    def _read_group(self, open_char: str, close_char: str) -> str | None:
+        """Read a balanced {...} or [...] group at the cursor, returning its raw body."""
+        start = self.pos
+        self._skip_whitespace()
+        if self.pos >= len(self.source) or self.source[self.pos] != open_char:
+            self.pos = start
+            return None
+
+        depth = 0
+        body_start = self.pos + 1
+        while self.pos < len(self.source):
+            char = self.source[self.pos]
+            if char == "\\":
+                self.pos += 2
+                continue
+            if char == open_char:
+                depth += 1
+            elif char == close_char:
+                depth -= 1
+                if depth == 0:
+                    body = self.source[body_start:self.pos]
+                    self.pos += 1
+                    return body
+            self.pos += 1
+
+        # Unbalanced - treat the rest as the group body
+        return self.source[body_start:]
+
+    def _read_args(self, count: int) -> list[str]:
+        self._read_group("[", "]")  # Optional argument, ignored
+        args = []
+        for _ in range(count):
+            body = self._read_group("{", "}")
+            args.append(expand(body) if body is not None else "")
+        return args
+
+    def _read_command_name(self) -> str:
+        start = self.pos
+        while self.pos < len(self.source) and self.source[self.pos].isalpha():
+            self.pos += 1
+        name = self.source[start:self.pos]
+        if self.pos < len(self.source) and self.source[self.pos] == "*":
+            self.pos += 1
+            name += "*"
+        return name
+
+    def run(self) -> str:
+        out = []
+        source = self.source
+
+        while self.pos < len(source):
+            char = source[self.pos]
+
+            if char == "\\":
+                self.pos += 1
+                if self.pos >= len(source):
+                    break
+
+                next_char = source[self.pos]
+                if next_char == "\\":
+                    self.pos += 1
+                    self._read_group("[", "]")
+                    out.append("\n")
+                    continue
+                if not next_char.isalpha():
+                    self.pos += 1
+                    out.append(_ESCAPES.get(next_char, ""))
+                    continue
+
+                name = self._read_command_name()
+
+                if name in _MACROS:
+                    count, render = _MACROS[name]
+                    out.append(render(self._read_args(count)))
+                elif name in _DROP_WITH_ARGS:
+                    self._read_args(_DROP_WITH_ARGS[name])
+                elif name in ("begin", "end"):
+                    env = self._read_group("{", "}") or ""
+                    if name == "begin":
+                        self._read_args(_ENV_ARGS.get(env, 0))
+                    out.append("\n")
+                elif name == "item":
+                    self._read_group("[", "]")
+                    out.append("\n- ")
+                else:
+                    # Formatting (\textbf, \emph, ...) unwraps its argument;
+                    # declarations and icons (\Huge, \faPhone, ...) vanish.
+                    body = self._read_group("{", "}")
+                    if body is not None:
+                        out.append(expand(body))
+                    else:
+                        out.append(" ")
+                continue
+
+            if char == "{":
+                body = self._read_group("{", "}")
+                out.append(expand(body or ""))
+                continue
+
+            if char == "}":
+                self.pos += 1
+                continue
+
+            if char == "$":
+                self.pos += 1
+                continue
+
+            if char == "~":
+                out.append(" ")
+                self.pos += 1
+                continue
+
+            out.append(char)
+            self.pos += 1
+
+        return "".join(out)
+
+
+def expand(source: str) -> str:
+    """Expand LaTeX commands in source into plain text."""
+    return _Expander(source).run()
+
+
+def _tidy(text: str) -> str:
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    text = "\n".join(lines)
+    text = re.sub(r"\n-(?=\n|$)", "\n", text)  # Bullets left empty by dropped content
+    text = re.sub(r"\n\n+(?=- )", "\n", text)  # Keep bullet lists tight
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def normalize_resume_text(text: str) -> NormalizedResume:
+    """
+    Convert LaTeX resume source to plain structured text.
+
+    Text that doesn't look like LaTeX (e.g. extracted from a PDF) is
+    returned unchanged.
+    """
+    original_tokens = estimate_tokens(text)
+
+    if not looks_like_latex(text):
+        return NormalizedResume(text, False, original_tokens, original_tokens)
+
+    body = _COMMENT_RE.sub("", text)
+    document = _DOCUMENT_RE.search(body)
+    if document:
+        body = document.group(1)
+
+    normalized = _tidy(expand(_DASH_RE.sub("-", body)))
+    return NormalizedResume(normalized, True, original_tokens, estimate_tokens(normalized))
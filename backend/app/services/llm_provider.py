@@ -0,0 +1,106 @@
+"""
+Chat model factory and per-stage model routing.
+
+LLM_PROVIDER selects the backend: "gemini" (default) or "fake", the
+in-process model in fake_llm used for CI and load testing. Models are
+wrapped so every call goes through the shared llm_scheduler.
+
+Each stage (plan, write, refine, parse) has its own configurable model,
+falling back to GEMINI_MODEL; requests may override any stage with a
+model in LLM_ALLOWED_MODELS.
+"""
+from langchain_core.language_models.chat_models import BaseChatModel
+from app.config import get_settings
+from app.services.llm_scheduler import ScheduledChatModel, llm_scheduler
+
+settings = get_settings()
+
+STAGES = ("plan", "write", "refine", "parse")
+
+# (model, temperature) -> model instance, so stages sharing a model share a client
+_models: dict[tuple[str, float], ScheduledChatModel] = {}
+
+
+class UnknownModelError(ValueError):
+    """A per-request model override isn't in the allowed list."""
+
+
+def check_model_override(model: str | None) -> None:
+    """Raise UnknownModelError if a per-request model override isn't allowed."""
+    if model and model != settings.gemini_model and model not in settings.llm_allowed_models:
+        raise UnknownModelError(
+            f"Model '{model}' is not allowed; choose one of {settings.llm_allowed_models}"
+        )
+
+
+def resolve_stage_model(
+    stage: str,
+    generation_type: str | None = None,
+    override: str | None = None,
+) -> str:
+    """
+    Pick the model for a pipeline stage.
+
+    Precedence: request override, then the per-type write model (writing
+    stage only), then the stage's setting, then GEMINI_MODEL.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown LLM stage: {stage}")
+
+    if override:
+        check_model_override(override)
+        return override
+
+    if stage == "write" and generation_type in settings.llm_write_model_by_type:
+        return settings.llm_write_model_by_type[generation_type]
+
+    return getattr(settings, f"llm_{stage}_model") or settings.gemini_model
+
+
+def get_chat_model(model: str, temperature: float) -> ScheduledChatModel:
+    """Return the shared scheduled chat model for a model name and temperature."""
+    key = (model, temperature)
+    if key not in _models:
+        _models[key] = create_chat_model(temperature, model)
+    return _models[key]
+
+
+def create_chat_model(temperature: float, model: str | None = None) -> ScheduledChatModel:
+    """Build a scheduled chat model for the configured provider."""
+    model = model or settings.gemini_model
+    llm = _create_provider_model(temperature, model)
+    # Fake models get their own limiter keys so routing is visible in scheduler stats
+    scheduler_key = f"fake:{model}" if settings.llm_provider.lower() == "fake" else model
+    return ScheduledChatModel(llm, scheduler_key, llm_scheduler)
+
+
+def _create_provider_model(temperature: float, model: str) -> BaseChatModel:
+    provider = settings.llm_provider.lower()
+
+    if provider == "fake":
+        from app.services.fake_llm import FakeChatModel
+
+        return FakeChatModel(
+            time_to_first_token=settings.fake_llm_ttft_seconds,
+            tokens_per_second=settings.fake_llm_tokens_per_second,
+            error_rate=settings.fake_llm_error_rate,
+            responses_path=settings.fake_llm_responses_path,
+            seed=settings.fake_llm_seed,
+        )
+
+    if provider == "gemini":
+        # Imported here so the fake provider works without the Gemini SDK installed
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        if not settings.gemini_api_key:
+            raise ValueError("GEMINI_API_KEY is required when LLM_PROVIDER is 'gemini'")
+
+        return ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=settings.gemini_api_key,
+            temperature=temperature,
+            convert_system_message_to_human=True,
+            max_retries=1,  # Retries and backoff are handled by llm_scheduler
+        )
+
+    raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
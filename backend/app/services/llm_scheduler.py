@@ -0,0 +1,304 @@
+"""
+Central scheduler for LLM calls.
+
+Every call goes through a per-model limiter: a concurrency cap plus token
+buckets for requests/minute and tokens/minute, so bursts queue locally
+instead of tripping provider quotas. Rate-limit and transient provider
+errors are retried with jittered exponential backoff.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from app.config import get_settings
+from app.metrics import (
+    LLM_CALL_DURATION,
+    LLM_CALL_TOKENS,
+    LLM_CALLS,
+    LLM_IN_FLIGHT,
+    LLM_QUEUED,
+    LLM_RETRIES,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TOKENS,
+)
+from app.services.tokens import estimate_tokens
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Substrings of provider errors worth retrying (rate limits, quota, transient outages)
+_RETRYABLE_MARKERS = (
+    "429", "resource_exhausted", "resourceexhausted", "rate limit", "ratelimit",
+    "quota", "503", "unavailable", "500 internal", "deadline", "timeout", "timed out",
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """An LLM call kept failing with rate-limit or transient errors until retries ran out."""
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Whether an LLM error is a rate limit or transient failure worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+class TokenBucket:
+    """Continuously refilling token bucket; waiters are served in arrival order."""
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take amount tokens, waiting for them to refill. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class _ModelLimiter:
+    """Limits and counters for one model."""
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int, max_concurrency: int):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.throttled_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+
+class LLMScheduler:
+    """Admits, retries and accounts for LLM calls across the whole process."""
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+    ):
+        self.requests_per_minute = requests_per_minute or settings.llm_requests_per_minute
+        self.tokens_per_minute = tokens_per_minute or settings.llm_tokens_per_minute
+        self.max_concurrency = max_concurrency or settings.llm_max_concurrency
+        self.max_retries = max_retries if max_retries is not None else settings.llm_max_retries
+        self._limiters: dict[str, _ModelLimiter] = {}
+
+    def _limiter(self, model_name: str) -> _ModelLimiter:
+        if model_name not in self._limiters:
+            self._limiters[model_name] = _ModelLimiter(
+                model_name, self.requests_per_minute, self.tokens_per_minute, self.max_concurrency
+            )
+        return self._limiters[model_name]
+
+    @staticmethod
+    def _prompt_tokens(messages: list) -> int:
+        return estimate_tokens("".join(str(message.content) for message in messages))
+
+    @staticmethod
+    def _record_tokens(model_name: str, input_tokens: int, output_tokens: int) -> None:
+        for direction, count in (("input", input_tokens), ("output", output_tokens)):
+            LLM_CALL_TOKENS.labels(model_name, direction).observe(count)
+            LLM_TOKENS.labels(model_name, direction).inc(count)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        ceiling = min(settings.llm_retry_max_seconds, settings.llm_retry_base_seconds * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    @asynccontextmanager
+    async def _slot(self, limiter: _ModelLimiter, reserved_tokens: int):
+        """Wait for a concurrency slot and rate-limit budget, then hold the slot."""
+        limiter.queued += 1
+        LLM_QUEUED.labels(limiter.name).inc()
+        try:
+            await limiter.semaphore.acquire()
+            try:
+                limiter.throttled_seconds += await limiter.requests.acquire(1)
+                limiter.throttled_seconds += await limiter.tokens.acquire(reserved_tokens)
+            except BaseException:
+                limiter.semaphore.release()
+                raise
+        finally:
+            limiter.queued -= 1
+            LLM_QUEUED.labels(limiter.name).dec()
+
+        limiter.in_flight += 1
+        LLM_IN_FLIGHT.labels(limiter.name).inc()
+        try:
+            yield
+        finally:
+            limiter.in_flight -= 1
+            LLM_IN_FLIGHT.labels(limiter.name).dec()
+            limiter.semaphore.release()
+
+    async def _handle_failure(self, limiter: _ModelLimiter, model_name: str, error: Exception, attempt: int) -> None:
+        """Sleep before the next attempt, or raise if the error is final."""
+        retryable = is_retryable_error(error)
+        if not retryable or attempt >= self.max_retries:
+            limiter.failed += 1
+            LLM_CALLS.labels(model_name, "failed").inc()
+            if retryable:
+                raise LLMUnavailableError(
+                    f"{model_name} still unavailable after {attempt + 1} attempts: {error}"
+                ) from error
+            raise error
+
+        limiter.retries += 1
+        LLM_RETRIES.labels(model_name).inc()
+        message = str(error).lower()
+        if "429" in message or "exhausted" in message or "quota" in message:
+            limiter.rate_limited += 1
+
+        delay = self._backoff_delay(attempt)
+        logger.warning(
+            "LLM call to %s failed (attempt %s), retrying in %.1fs: %s",
+            model_name, attempt + 1, delay, error,
+        )
+        await asyncio.sleep(delay)
+
+    async def ainvoke(self, llm: Any, model_name: str, messages: list) -> Any:
+        """Run llm.ainvoke under the model's limits, retrying retryable errors."""
+        limiter = self._limiter(model_name)
+        prompt_tokens = self._prompt_tokens(messages)
+        reserved = prompt_tokens + settings.llm_output_token_reserve
+        attempt = 0
+
+        while True:
+            try:
+                async with self._slot(limiter, reserved):
+                    started = time.perf_counter()
+                    response = await llm.ainvoke(messages)
+                    LLM_CALL_DURATION.labels(model_name, "invoke").observe(time.perf_counter() - started)
+            except Exception as e:
+                await self._handle_failure(limiter, model_name, e, attempt)
+                attempt += 1
+                continue
+
+            # Settle the token bucket against actual usage when the provider reports it
+            usage = getattr(response, "usage_metadata", None) or {}
+            if usage.get("total_tokens"):
+                limiter.tokens.adjust(reserved - usage["total_tokens"])
+
+            self._record_tokens(
+                model_name,
+                usage.get("input_tokens") or prompt_tokens,
+                usage.get("output_tokens") or estimate_tokens(str(response.content)),
+            )
+            limiter.completed += 1
+            LLM_CALLS.labels(model_name, "succeeded").inc()
+            return response
+
+    async def astream(self, llm: Any, model_name: str, messages: list) -> AsyncIterator[Any]:
+        """
+        Stream llm.astream under the model's limits.
+
+        Retries only happen before the first chunk; once output has reached
+        the caller a failure is raised as-is.
+        """
+        limiter = self._limiter(model_name)
+        prompt_tokens = self._prompt_tokens(messages)
+        reserved = prompt_tokens + settings.llm_output_token_reserve
+        attempt = 0
+
+        while True:
+            started = False
+            output_chars = 0
+            try:
+                async with self._slot(limiter, reserved):
+                    began = time.perf_counter()
+                    async for chunk in llm.astream(messages):
+                        if not started:
+                            LLM_TIME_TO_FIRST_TOKEN.labels(model_name).observe(time.perf_counter() - began)
+                        started = True
+                        output_chars += len(str(chunk.content))
+                        yield chunk
+                    LLM_CALL_DURATION.labels(model_name, "stream").observe(time.perf_counter() - began)
+            except Exception as e:
+                if started:
+                    limiter.failed += 1
+                    LLM_CALLS.labels(model_name, "failed").inc()
+                    raise
+                await self._handle_failure(limiter, model_name, e, attempt)
+                attempt += 1
+                continue
+
+            self._record_tokens(model_name, prompt_tokens, (output_chars + 3) // 4)
+            limiter.completed += 1
+            LLM_CALLS.labels(model_name, "succeeded").inc()
+            return
+
+    def stats(self) -> dict:
+        """Queue depth, in-flight calls and retry counters per model."""
+        return {
+            "limits": {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "max_concurrency": self.max_concurrency,
+                "max_retries": self.max_retries,
+            },
+            "models": {name: limiter.stats() for name, limiter in self._limiters.items()},
+        }
+
+
+class ScheduledChatModel:
+    """Chat model wrapper that routes ainvoke/astream through the scheduler."""
+
+    def __init__(self, llm: Any, model_name: str, scheduler: LLMScheduler):
+        self.llm = llm
+        self.model_name = model_name
+        self.scheduler = scheduler
+
+    async def ainvoke(self, messages: list) -> Any:
+        return await self.scheduler.ainvoke(self.llm, self.model_name, messages)
+
+    def astream(self, messages: list) -> AsyncIterator[Any]:
+        return self.scheduler.astream(self.llm, self.model_name, messages)
+
+
+# Shared by every service so limits apply process-wide
+llm_scheduler = LLMScheduler()
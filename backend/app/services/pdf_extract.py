@@ -0,0 +1,29 @@
+"""
+PDF text extraction that runs in worker processes.
+
+Kept free of app imports so child processes start quickly and the
+functions here stay picklable for ProcessPoolExecutor.
+"""
+import mmap
+from pypdf import PdfReader
+
+
+def count_pages(pdf_path: str) -> int:
+    """Number of pages in a PDF on disk; reads only the page tree, not page content."""
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return len(PdfReader(mapped).pages)
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> list[str]:
+    """
+    Extract text from pages [start, stop) of a PDF on disk.
+
+    The file is memory-mapped rather than read, so concurrent workers on the
+    same upload share the page cache instead of each holding a copy.
+    """
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = PdfReader(mapped)
+        return [
+            reader.pages[index].extract_text() or ""
+            for index in range(start, min(stop, len(reader.pages)))
+        ]
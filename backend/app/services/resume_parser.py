@@ -1,48 +1,299 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage
 from app.config import get_settings
-from pypdf import PdfReader
-from io import BytesIO
+from app.metrics import observe_stage
+from app.services.cache import ResultCache
+from app.services.llm_provider import get_chat_model, resolve_stage_model
+from app.services.latex_normalizer import NormalizedResume, normalize_resume_text, looks_like_latex
+from app.services.llm_scheduler import ScheduledChatModel
+from app.services.resume_sections import split_resume_sections
+from app.services.pdf_extract import count_pages, extract_page_range
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import json
+import logging
 import re
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompts or response cleanup change so cached parses are redone
+PARSER_VERSION = 1
+
+# Fields each locally-split section is responsible for
+_SECTION_FIELDS = {
+    "header": ("name", "email", "phone", "location", "bio", "links"),
+    "experience": ("experience",),
+    "projects": ("projects",),
+    "skills": ("skills",),
+    "education": ("education",),
+    "extras": ("achievements", "certifications", "languages", "interests"),
+}
+
+# (instructions, JSON format) for each section's focused prompt
+_SECTION_PROMPTS = {
+    "header": (
+        """Extract the person's contact details and links from this resume header.
+- name: full name (usually the first prominent line)
+- email, phone, location: as written
+- bio: 1-2 sentences built from their job title and top skills, e.g. "Backend Engineer with experience in FastAPI, Django, and cloud infrastructure"
+- links: GitHub, LinkedIn and portfolio URLs; any other URLs go in "other\"""",
+        """{
+  "name": "Full Name",
+  "email": "email@example.com",
+  "phone": "+91-XXXXXXXXXX",
+  "location": "City, State/Country",
+  "bio": "Current role with experience in Y and Z",
+  "links": {"github": null, "linkedin": null, "portfolio": null, "twitter": null, "other": {}}
+}""",
+    ),
+    "experience": (
+        """Extract EVERY work experience entry.
+- company, role, duration (date range as written)
+- description: combine ALL bullet points for the entry into one detailed paragraph, keeping every metric""",
+        """{
+  "experience": [
+    {"company": "Company Name", "role": "Job Title", "duration": "Month YYYY - Month YYYY", "description": "Detailed paragraph"}
+  ]
+}""",
+    ),
+    "projects": (
+        """Extract EVERY project entry.
+- name: project name
+- description: combine ALL bullet points into one detailed paragraph
+- tech_stack: technologies listed for the project (often after a "|" or "Technologies:")
+- link: repository or demo URL if present""",
+        """{
+  "projects": [
+    {"name": "Project Name", "description": "Detailed paragraph", "tech_stack": ["Tech1", "Tech2"], "link": null}
+  ]
+}""",
+    ),
+    "skills": (
+        """Extract EVERY skill mentioned - languages, frameworks, databases, cloud services, tools, everything.
+Flatten all categories into one array.""",
+        """{
+  "skills": ["Python", "FastAPI", "PostgreSQL", "AWS"]
+}""",
+    ),
+    "education": (
+        """Extract every education entry: institution, degree, year or date range, and GPA/CGPA if mentioned.""",
+        """{
+  "education": [
+    {"institution": "University Full Name", "degree": "Bachelor of Technology, Computer Science", "year": "Aug 2023 - Present", "gpa": "8.8/10.0"}
+  ]
+}""",
+    ),
+    "extras": (
+        """Extract achievements/awards, certifications, spoken languages and interests/hobbies.
+- certifications: each with name, issuer and date""",
+        """{
+  "achievements": [],
+  "certifications": [{"name": "Certification", "issuer": "Issuer", "date": "YYYY"}],
+  "languages": [],
+  "interests": null
+}""",
+    ),
+}
 
 
 class ResumeParser:
     """Service for parsing resumes (PDF or LaTeX) and extracting structured data."""
 
     def __init__(self):
-        """Initialize the Gemini LLM for parsing."""
-        self.llm = ChatGoogleGenerativeAI(
-            model=settings.gemini_model,
-            google_api_key=settings.gemini_api_key,
-            temperature=0.1,  # Low temperature for accurate extraction
-            convert_system_message_to_human=True,
+        self._pdf_pool: ProcessPoolExecutor | None = None
+        self.cache = ResultCache(
+            "resume_parse",
+            max_entries=settings.resume_cache_max_entries,
+            ttl_seconds=settings.resume_cache_ttl_seconds,
+            db_path=settings.resume_cache_db_path,
+            max_disk_entries=settings.resume_cache_max_disk_entries,
         )
 
-    async def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
-        """Extract text from PDF bytes."""
-        try:
-            pdf_file = BytesIO(pdf_bytes)
-            reader = PdfReader(pdf_file)
+    def _llm(self, model: str | None = None) -> ScheduledChatModel:
+        """The parse model, or a per-request override of it."""
+        # Low temperature for accurate extraction
+        return get_chat_model(resolve_stage_model("parse", override=model), 0.1)
 
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+    def _get_pdf_pool(self) -> ProcessPoolExecutor:
+        """Create the PDF extraction process pool on first use."""
+        if self._pdf_pool is None:
+            self._pdf_pool = ProcessPoolExecutor(max_workers=settings.pdf_pool_workers)
+        return self._pdf_pool
 
-            return text.strip()
+    def shutdown(self) -> None:
+        """Release the PDF extraction process pool."""
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown(wait=False, cancel_futures=True)
+            self._pdf_pool = None
+
+    def _recycle_pdf_pool(self) -> None:
+        """
+        Kill the pool's worker processes and start over with a fresh pool.
+
+        Cancelling the await on timeout leaves a runaway extraction running in
+        its worker, so the workers are terminated outright. Other extractions
+        still in flight on the old pool fail with BrokenProcessPool.
+        """
+        pool, self._pdf_pool = self._pdf_pool, None
+        if pool is None:
+            return
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _extract_pages(self, pdf_path: str) -> list[str]:
+        """Extract page texts in the process pool, fanning out for long documents."""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pdf_pool()
+        chunk = settings.pdf_pages_per_worker
+
+        # Reject oversized documents before extracting any page content
+        total = await loop.run_in_executor(pool, count_pages, pdf_path)
+        if total > settings.pdf_max_pages:
+            raise ValueError(
+                f"PDF has {total} pages; at most {settings.pdf_max_pages} are supported"
+            )
+
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(pool, extract_page_range, pdf_path, start, start + chunk)
+            for start in range(0, total, chunk)
+        ))
+        return [text for chunk_texts in chunks for text in chunk_texts]
+
+    async def extract_text_from_pdf(self, pdf_path: str) -> str:
+        """Extract text from a PDF file without blocking the event loop."""
+        try:
+            with observe_stage("pdf_extract"):
+                texts = await asyncio.wait_for(
+                    self._extract_pages(pdf_path),
+                    timeout=settings.pdf_extract_timeout_seconds,
+                )
+            return "\n".join(texts).strip()
+        except ValueError:
+            raise
+        except asyncio.TimeoutError:
+            self._recycle_pdf_pool()
+            raise ValueError(
+                f"PDF text extraction timed out after {settings.pdf_extract_timeout_seconds:g} seconds"
+            )
         except Exception as e:
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
-    async def parse_resume(self, resume_text: str) -> dict:
+    def _parser_key_parts(self, llm: ScheduledChatModel) -> tuple:
+        """Everything besides the input that changes what a parse returns."""
+        return (
+            PARSER_VERSION,
+            llm.model_name,
+            settings.resume_latex_prestrip,
+            settings.resume_section_parallel,
+        )
+
+    def _text_cache_key(self, resume_text: str, llm: ScheduledChatModel) -> str:
+        """Key on whitespace-normalized text so re-exports of the same resume still hit."""
+        normalized = " ".join(resume_text.split())
+        return ResultCache.make_key("text", *self._parser_key_parts(llm), normalized)
+
+    def _pdf_cache_key(self, pdf_sha256: str, llm: ScheduledChatModel) -> str:
+        """Key on the raw PDF bytes' hash so re-uploads skip extraction entirely."""
+        return ResultCache.make_key("pdf", *self._parser_key_parts(llm), pdf_sha256)
+
+    async def parse_resume_text(self, resume_text: str, model: str | None = None) -> tuple[dict, bool]:
         """
-        Parse resume text (from PDF or LaTeX) and extract structured information.
+        Parse resume text, serving repeats from the parse cache.
 
-        Returns a dictionary matching the UserProfileCreate schema.
+        model overrides the configured parse model.
+
+        Returns: (parsed_data, cached)
+        """
+        if not settings.resume_cache_enabled:
+            return await self.parse_resume(resume_text, model), False
+
+        text_key = self._text_cache_key(resume_text, self._llm(model))
+        cached = await self.cache.get(text_key)
+        if cached:
+            return cached, True
+
+        parsed_data = await self.parse_resume(resume_text, model)
+        await self.cache.set(text_key, parsed_data)
+        return parsed_data, False
+
+    async def parse_resume_pdf(
+        self, pdf_path: str, pdf_sha256: str, model: str | None = None
+    ) -> tuple[dict, bool]:
+        """
+        Extract and parse a PDF resume, checking the byte-hash tier before
+        extraction and the text-hash tier before calling the LLM.
+
+        Returns: (parsed_data, cached)
         """
+        if not settings.resume_cache_enabled:
+            resume_text = await self.extract_text_from_pdf(pdf_path)
+            return await self.parse_resume(resume_text, model), False
+
+        pdf_key = self._pdf_cache_key(pdf_sha256, self._llm(model))
+        cached = await self.cache.get(pdf_key)
+        if cached:
+            return cached, True
+
+        resume_text = await self.extract_text_from_pdf(pdf_path)
+        parsed_data, cached = await self.parse_resume_text(resume_text, model)
+        await self.cache.set(pdf_key, parsed_data)
+        return parsed_data, cached
+
+    def _prepare_text(self, resume_text: str) -> NormalizedResume | None:
+        """Normalize LaTeX input when pre-stripping is enabled; None means use the text as-is."""
+        if not settings.resume_latex_prestrip:
+            return None
+
+        normalized = normalize_resume_text(resume_text)
+        if not normalized.was_latex:
+            return None
+
+        logger.info(
+            "LaTeX pre-strip reduced resume input from ~%s to ~%s tokens (saved ~%s)",
+            normalized.original_tokens,
+            normalized.normalized_tokens,
+            normalized.tokens_saved,
+        )
+        return normalized
+
+    def _parse_json_response(self, content: str) -> dict:
+        """Parse a JSON object out of an LLM reply, tolerating code fences and stray escapes."""
+        try:
+            # Extract JSON from response (handle markdown code blocks if present)
+            response_text = content.strip()
+
+            # Remove markdown code blocks if present
+            if response_text.startswith("```json"):
+                response_text = response_text[7:]  # Remove ```json
+            elif response_text.startswith("```"):
+                response_text = response_text[3:]  # Remove ```
+
+            if response_text.endswith("```"):
+                response_text = response_text[:-3]  # Remove closing ```
+
+            response_text = response_text.strip()
+
+            # Fix common JSON escaping issues from AI responses
+            # Replace double backslashes with single backslash (e.g., "99.5\\%" -> "99.5%")
+            response_text = re.sub(r'\\\\([%$&])', r'\1', response_text)
+
+            return json.loads(response_text)
+
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse AI response as JSON: {str(e)}\nResponse: {content}")
+
+    def _build_full_prompt(self, resume_text: str, normalized: NormalizedResume | None) -> str:
+        """Build the single-call prompt that extracts every field at once."""
+        if normalized:
+            source_section = f"""You are an expert at extracting structured information from resumes.
 
-        prompt = f"""You are an expert at extracting structured information from resumes, especially LaTeX-formatted resumes.
+RESUME TEXT (converted from LaTeX: "## X" lines are section headers, "A | B" lines are heading fields, "- " lines are bullet points, "text (URL)" are links):
+{normalized.text}
+"""
+        else:
+            source_section = f"""You are an expert at extracting structured information from resumes, especially LaTeX-formatted resumes.
 
 RESUME TEXT (may contain LaTeX commands):
 {resume_text}
@@ -57,14 +308,16 @@ LATEX PARSING RULES:
 5. **Extract from custom commands**: \\resumeSubheading, \\resumeProjectHeading, \\resumeItem - extract the actual content inside curly braces
 6. **Special characters**: Handle \\&, \\%, \\$, etc. properly
 7. **Comments**: Ignore lines starting with %
+"""
 
+        prompt = source_section + """
 EXTRACTION INSTRUCTIONS:
 
 1. **HEADING / PERSONAL INFORMATION:**
    - Extract name (usually in \\Huge or first prominent text)
    - Extract job title/role (often right after name)
    - Phone: Look for \\faPhone or phone numbers (+91-XXX, etc.)
-   - Email: Look for \\faEnvelope or \\href{{mailto:...}}
+   - Email: Look for \\faEnvelope or \\href{mailto:...}
    - LinkedIn: Look for \\faLinkedin or linkedin.com URLs
    - GitHub: Look for \\faGithub or github.com URLs
    - Location: Extract from address/location fields if present
@@ -89,7 +342,7 @@ EXTRACTION INSTRUCTIONS:
      * name: Project name (from \\resumeProjectHeading or \\textbf)
      * description: Combine ALL project bullet points into a detailed paragraph
      * tech_stack: Extract technologies from the line with $|$ or "Technologies:" (like "Django, Gemini, AWS, Redis")
-     * link: GitHub URL if present (from \\href{{https://github.com/...}})
+     * link: GitHub URL if present (from \\href{https://github.com/...})
 
 5. **SKILLS (from "Technical Expertise", "Technical Skills", or "Skills" section):**
    - Extract EVERY skill mentioned
@@ -130,10 +383,10 @@ CRITICAL RULES:
 - Keep numbers and percentages (like "10,000+ users", "30% cost reduction", "99.9% uptime")
 - Preserve technical terms exactly as written
 - For experience/project descriptions: combine all bullet points into a flowing paragraph, don't lose any information
-- If a field is not found in the resume, use null (for strings) or [] (for arrays) or {{}} (for objects)
+- If a field is not found in the resume, use null (for strings) or [] (for arrays) or {} (for objects)
 
 Return ONLY valid JSON in this EXACT format (no markdown, no code blocks):
-{{
+{
   "name": "Full Name",
   "email": "email@example.com",
   "phone": "+91-XXXXXXXXXX",
@@ -141,83 +394,171 @@ Return ONLY valid JSON in this EXACT format (no markdown, no code blocks):
   "bio": "Current role with X years of experience in Y and Z",
   "skills": ["Python", "Django", "FastAPI", "PostgreSQL", "AWS", "Docker", "Redis", ...],
   "experience": [
-    {{
+    {
       "company": "Company Name",
       "role": "Job Title",
       "duration": "Month YYYY -- Month YYYY",
       "description": "Detailed paragraph combining all bullet points with metrics and achievements"
-    }}
+    }
   ],
   "projects": [
-    {{
+    {
       "name": "Project Name",
       "description": "Detailed paragraph combining all project bullet points",
       "tech_stack": ["Tech1", "Tech2", "Tech3"],
       "link": "https://github.com/username/repo"
-    }}
+    }
   ],
   "education": [
-    {{
+    {
       "institution": "University Full Name",
       "degree": "Bachelor of Technology, Computer Science and Engineering",
       "year": "Aug 2023 -- Present",
       "gpa": "8.8/10.0"
-    }}
+    }
   ],
-  "links": {{
+  "links": {
     "github": "https://github.com/username",
     "linkedin": "https://linkedin.com/in/username",
     "portfolio": null,
     "twitter": null,
-    "other": {{}}
-  }},
+    "other": {}
+  },
   "resume_url": null,
   "achievements": [],
   "certifications": [],
   "languages": [],
   "interests": null
-}}
+}
 
 CRITICAL OUTPUT FORMATTING:
 - Return ONLY the raw JSON object
 - DO NOT wrap in markdown code blocks (no ```json, no ```)
 - DO NOT add any text before or after the JSON
 - DO NOT escape percent signs or dollar signs (use 99.5% not 99.5\\%)
-- Start your response with {{ and end with }}
+- Start your response with { and end with }
 - Valid JSON only - test it in your head before responding
 
 RESPOND WITH ONLY THE JSON OBJECT."""
 
+        return prompt
+
+    async def _parse_whole(
+        self, resume_text: str, normalized: NormalizedResume | None, llm: ScheduledChatModel
+    ) -> dict:
+        """Extract every field with one LLM call."""
+        prompt = self._build_full_prompt(resume_text, normalized)
+
         messages = [HumanMessage(content=prompt)]
-        response = await self.llm.ainvoke(messages)
+        response = await llm.ainvoke(messages)
+        return self._parse_json_response(response.content)
 
-        # Parse the JSON response
-        try:
-            # Extract JSON from response (handle markdown code blocks if present)
-            response_text = response.content.strip()
+    def _build_section_prompt(self, section: str, sections: dict[str, str]) -> str:
+        """Build a small prompt that extracts only the fields owned by one section."""
+        instructions, json_format = _SECTION_PROMPTS[section]
 
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]  # Remove ```json
-            elif response_text.startswith("```"):
-                response_text = response_text[3:]  # Remove ```
+        section_text = sections[section]
+        if section == "header" and "skills" in sections:
+            # The bio is written from the title plus top skills
+            section_text += "\n\nSKILLS (for the bio only):\n" + sections["skills"]
 
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]  # Remove closing ```
+        return f"""You are extracting one section of a resume into JSON.
 
-            response_text = response_text.strip()
+RESUME SECTION:
+{section_text}
 
-            # Fix common JSON escaping issues from AI responses
-            # Replace double backslashes with single backslash (e.g., "99.5\\%" -> "99.5%")
-            response_text = re.sub(r'\\\\([%$&])', r'\1', response_text)
+{instructions}
 
-            parsed_data = json.loads(response_text)
+RULES:
+- Preserve technical terms, numbers and percentages exactly as written
+- If a field isn't present, use null (for strings) or [] (for arrays) or {{}} (for objects)
+- Return ONLY the raw JSON object - no markdown, no code blocks, no text before or after
+- DO NOT escape percent signs or dollar signs (use 99.5% not 99.5\\%)
 
-            # Validate and clean the data
-            return self._validate_and_clean_data(parsed_data)
+Return JSON in this EXACT format:
+{json_format}"""
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse AI response as JSON: {str(e)}\nResponse: {response.content}")
+    async def _parse_section(self, section: str, sections: dict[str, str], llm: ScheduledChatModel) -> dict:
+        """Extract one section, retrying just this section on a bad reply."""
+        prompt = self._build_section_prompt(section, sections)
+        messages = [HumanMessage(content=prompt)]
+        last_error = None
+
+        for attempt in range(1, settings.resume_section_max_attempts + 1):
+            try:
+                response = await llm.ainvoke(messages)
+                data = self._parse_json_response(response.content)
+                return {key: data.get(key) for key in _SECTION_FIELDS[section] if key in data}
+            except Exception as e:
+                last_error = e
+                logger.warning("Resume section '%s' failed on attempt %s: %s", section, attempt, e)
+
+        raise ValueError(f"Failed to parse resume section '{section}': {last_error}")
+
+    async def _parse_by_sections(
+        self,
+        sections: dict[str, str],
+        resume_text: str,
+        normalized: NormalizedResume | None,
+        llm: ScheduledChatModel,
+    ) -> dict:
+        """
+        Extract each section concurrently and merge the partial results.
+
+        Fields of sections that still fail after their retries are taken from
+        one single-call parse of the whole resume; if that fails too they're
+        left empty.
+        """
+        names = [name for name in sections if name in _SECTION_PROMPTS]
+        results = await asyncio.gather(
+            *(self._parse_section(name, sections, llm) for name in names),
+            return_exceptions=True,
+        )
+
+        merged = {}
+        failed = []
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                failed.append(name)
+                continue
+            merged.update(result)
+
+        if failed:
+            logger.warning("Falling back to a single-call parse for resume sections: %s", ", ".join(failed))
+            try:
+                whole = await self._parse_whole(resume_text, normalized, llm)
+            except Exception as e:
+                logger.warning("Single-call fallback failed; leaving sections empty: %s", e)
+            else:
+                for name in failed:
+                    merged.update({key: whole[key] for key in _SECTION_FIELDS[name] if key in whole})
+
+        return merged
+
+    async def parse_resume(self, resume_text: str, model: str | None = None) -> dict:
+        """
+        Parse resume text (from PDF or LaTeX) and extract structured information.
+
+        Resumes with recognizable section headings are split locally and each
+        section is extracted concurrently with a focused prompt; anything else
+        goes to the model in a single call.
+
+        model overrides the configured parse model.
+
+        Returns a dictionary matching the UserProfileCreate schema.
+        """
+        llm = self._llm(model)
+        with observe_stage("parse"):
+            normalized = self._prepare_text(resume_text)
+
+            # Raw LaTeX (pre-strip disabled) has no plain-text headings to split on
+            if settings.resume_section_parallel and (normalized or not looks_like_latex(resume_text)):
+                sections = split_resume_sections(normalized.text if normalized else resume_text)
+                if "header" in sections and len(sections) >= 3:
+                    data = await self._parse_by_sections(sections, resume_text, normalized, llm)
+                    return self._validate_and_clean_data(data)
+
+            return self._validate_and_clean_data(await self._parse_whole(resume_text, normalized, llm))
 
     def _validate_and_clean_data(self, data: dict) -> dict:
         """Validate and clean the parsed data."""
@@ -0,0 +1,71 @@
+"""
+Local section splitting for plain-text resumes.
+
+Works on PDF-extracted text and on LaTeX already normalized by
+latex_normalizer (whose section headers come out as "## Title").
+"""
+import re
+
+# Section key -> heading keywords that introduce it
+_SECTION_HEADINGS = {
+    "experience": (
+        "experience", "work experience", "professional experience", "employment",
+        "work history", "internships", "internship experience",
+    ),
+    "projects": (
+        "projects", "key projects", "personal projects", "academic projects",
+        "selected projects", "side projects",
+    ),
+    "skills": (
+        "skills", "technical skills", "technical expertise", "technologies",
+        "skills & tools", "tools & technologies", "core competencies",
+    ),
+    "education": ("education", "academics", "academic background"),
+    "extras": (
+        "achievements", "awards", "honors", "honours", "certifications",
+        "certificates", "languages", "interests", "hobbies", "activities",
+        "extracurricular activities", "leadership", "publications", "volunteering",
+    ),
+}
+
+_HEADING_LOOKUP = {
+    heading: section
+    for section, headings in _SECTION_HEADINGS.items()
+    for heading in headings
+}
+
+_HEADING_CLEAN_RE = re.compile(r"^[#\s]+|[\s:]+$")
+
+
+def _heading_section(line: str) -> str | None:
+    """Return the section a line introduces, or None if it isn't a heading."""
+    candidate = _HEADING_CLEAN_RE.sub("", line).lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    candidate = candidate.replace(" and ", " & ")
+    return _HEADING_LOOKUP.get(candidate)
+
+
+def split_resume_sections(text: str) -> dict[str, str]:
+    """
+    Split resume text into header, experience, projects, skills, education
+    and extras. Text before the first recognized heading is the header;
+    repeated sections (e.g. "Awards" and "Certifications") are concatenated.
+    """
+    sections: dict[str, list[str]] = {"header": []}
+    current = "header"
+
+    for line in text.splitlines():
+        section = _heading_section(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            sections[current].append(_HEADING_CLEAN_RE.sub("", line))
+            continue
+        sections[current].append(line)
+
+    return {
+        name: "\n".join(lines).strip()
+        for name, lines in sections.items()
+        if "\n".join(lines).strip()
+    }
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO
+from fastapi import UploadFile
+from app.config import get_settings
+
+settings = get_settings()
+
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+def _too_large(max_bytes: int) -> UploadTooLargeError:
+    return UploadTooLargeError(
+        f"PDF exceeds the maximum upload size of {max_bytes // (1024 * 1024)} MB"
+    )
+
+
+def _copy_pdf(source: BinaryIO, max_bytes: int, chunk_bytes: int) -> tuple[str, str]:
+    """Validate, hash and copy a PDF to a named temporary file (blocking; run in a thread)."""
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(chunk_bytes):
+                if size == 0 and not chunk.startswith(PDF_MAGIC):
+                    raise ValueError("Uploaded file is not a valid PDF")
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise ValueError("Uploaded file is empty")
+
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return path, digest.hexdigest()
+
+
+async def spool_pdf_upload(file: UploadFile) -> tuple[str, str]:
+    """
+    Copy an uploaded PDF to a named temporary file, validating it on the way.
+
+    Starlette has already spooled the multipart body by the time the handler
+    runs, but into memory (small files) or an unnamed temporary file. PDF
+    extraction workers memory-map the upload by path in separate processes,
+    so it still needs one named copy. The copy runs in a worker thread so
+    the event loop never blocks on disk I/O.
+
+    Returns: (temp_file_path, sha256_hex). The caller must delete the file.
+    """
+    max_bytes = settings.max_upload_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    await file.seek(0)
+    return await asyncio.to_thread(_copy_pdf, file.file, max_bytes, settings.upload_chunk_bytes)
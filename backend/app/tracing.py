@@ -0,0 +1,222 @@
+"""
+Lightweight request tracing.
+
+TracingMiddleware opens a trace per request; stages (DB statements,
+example lookup, plan, write, ...) record spans under it through
+contextvars, so nothing has to be passed around explicitly.
+
+Sampling is decided once at the head of each request (an incoming W3C
+traceparent's sampled flag wins, otherwise TRACING_SAMPLE_RATE). Unsampled
+requests only keep per-stage totals for the Server-Timing header; sampled
+ones also keep every span and are exported as one JSON line per trace.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import get_settings
+
+settings = get_settings()
+
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+    name: str
+    span_id: str
+    parent_id: str | None
+    start: float
+    end: float | None = None
+    attributes: dict = field(default_factory=dict)
+
+
+class Trace:
+    """Spans and per-stage totals for a single request."""
+
+    def __init__(self, name: str, sampled: bool, trace_id: str | None = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.name = name
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+        self.stage_totals: dict[str, float] = {}
+
+    def record(self, span: Span) -> None:
+        self.stage_totals[span.name] = self.stage_totals.get(span.name, 0.0) + span.end - span.start
+        if self.sampled:
+            self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """Render stage totals (and time so far) as a Server-Timing header value."""
+        entries = [
+            f"{name};dur={seconds * 1000:.1f}"
+            for name, seconds in self.stage_totals.items()
+            if name != "request"
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ms": round((span.start - self.start) * 1000, 3),
+                    "duration_ms": round((span.end - span.start) * 1000, 3),
+                    "attributes": span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def start_trace(name: str, traceparent: str | None = None) -> Trace:
+    """Begin a trace in the current context, honouring an incoming traceparent."""
+    match = _TRACEPARENT_RE.match(traceparent or "")
+    if match:
+        trace = Trace(name, sampled=bool(int(match.group(2), 16) & 1), trace_id=match.group(1))
+    else:
+        trace = Trace(name, sampled=random.random() < settings.tracing_sample_rate)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def end_trace() -> None:
+    """Detach the current trace from the context."""
+    _current_trace.set(None)
+    _current_span.set(None)
+
+
+def _new_span(trace: Trace, name: str, start: float, attributes: dict) -> Span:
+    parent = _current_span.get()
+    return Span(
+        name=name,
+        span_id=secrets.token_hex(8) if trace.sampled else "",
+        parent_id=parent.span_id if parent else None,
+        start=start,
+        attributes=attributes if trace.sampled else {},
+    )
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a span of the current trace (no-op outside a trace)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = _new_span(trace, name, time.perf_counter(), attributes)
+    parent = _current_span.get()
+    _current_span.set(current)
+    try:
+        yield current
+    finally:
+        # set() rather than reset(): async generators may finish in another context
+        _current_span.set(parent)
+        current.end = time.perf_counter()
+        trace.record(current)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record a "db" span for every statement run inside a trace."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["trace_start_times"].pop()
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        db_span = _new_span(trace, "db", started, {"statement": statement[:200]})
+        db_span.end = time.perf_counter()
+        trace.record(db_span)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # A failed statement never reaches after_cursor_execute; close its span here
+        if context.connection is None or context.execution_context is None:
+            return
+        stack = context.connection.info.get("trace_start_times")
+        if not stack:
+            return
+        started = stack.pop()
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        db_span = _new_span(trace, "db", started, {
+            "statement": (context.statement or "")[:200],
+            "error": type(context.original_exception).__name__,
+        })
+        db_span.end = time.perf_counter()
+        trace.record(db_span)
+
+
+class TraceExporter:
+    """Writes sampled traces as JSON lines to stdout or a file."""
+
+    def __init__(self, target: str, file_path: str):
+        self.target = target
+        self.file_path = file_path
+        self._lock = threading.Lock()
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            if self.target == "stdout":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+    async def export(self, trace: Trace) -> None:
+        if self.target == "none":
+            return
+        line = json.dumps(trace.to_dict(), default=str) + "\n"
+        await asyncio.to_thread(self._write, line)
+
+
+def configure_langsmith() -> None:
+    """Turn on LangChain's LangSmith tracing when an API key is configured."""
+    if not settings.langsmith_api_key:
+        return
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
+    os.environ.setdefault("LANGCHAIN_API_KEY", settings.langsmith_api_key)
+    if settings.langsmith_project:
+        os.environ.setdefault("LANGCHAIN_PROJECT", settings.langsmith_project)
+    # Apply the same head sampling rate to LangSmith runs
+    os.environ.setdefault("LANGSMITH_TRACING_SAMPLING_RATE", str(settings.tracing_sample_rate))
+
+
+trace_exporter = TraceExporter(settings.tracing_exporter, settings.tracing_file_path)
@@ -0,0 +1,21 @@
+"""
+Standalone bulk generation worker.
+
+Run one or more of these next to the API to scale background jobs:
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+from app.database import init_db
+from app.services.job_queue import JobWorker
+
+
+async def main():
+    await init_db()
+    await JobWorker().run_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Schema upgrade paths run by init_db."""
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, inspect
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from app.database import _BASELINE_REVISION, _alembic_config, _upgrade_schema, _upgrade_schema_locked
+
+
+def _baseline_metadata():
+    script = ScriptDirectory.from_config(_alembic_config())
+    return script.get_revision(_BASELINE_REVISION).module.baseline_metadata()
+
+
+def _head() -> str:
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def _upgrade(engine) -> None:
+    with engine.begin() as conn:
+        _upgrade_schema(conn)
+
+
+def _revision(engine) -> str | None:
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def test_fresh_database_migrates_to_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    _upgrade(engine)
+
+    assert _revision(engine) == _head()
+    tables = set(inspect(engine).get_table_names())
+    assert {"companies", "examples", "cache_versions", "companies_fts"} <= tables
+
+
+def test_pre_migration_database_is_adopted_and_upgraded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+    # What create_all built before migrations existed, from a release that
+    # predated background jobs and materialized context blocks
+    metadata = _baseline_metadata()
+    metadata.remove(metadata.tables["generation_tasks"])
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE companies DROP COLUMN context_block")
+        conn.exec_driver_sql(
+            "INSERT INTO companies (name, description) VALUES ('Acme', 'Robots for warehouses')"
+        )
+
+    _upgrade(engine)
+
+    assert _revision(engine) == _head()
+    inspector = inspect(engine)
+    assert {"generation_tasks", "cache_versions", "companies_fts"} <= set(inspector.get_table_names())
+    assert "context_block" in {column["name"] for column in inspector.get_columns("companies")}
+    index_names = {index["name"] for index in inspector.get_indexes("examples")}
+    assert "ix_examples_type_rating" in index_names
+
+    with engine.connect() as conn:
+        # Existing rows are indexed for search by the FTS migration
+        matches = conn.exec_driver_sql(
+            "SELECT rowid FROM companies_fts WHERE companies_fts MATCH 'warehouses'"
+        ).all()
+    assert matches == [(1,)]
+
+
+def test_up_to_date_database_is_left_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    _upgrade(engine)
+    _upgrade(engine)
+
+    assert _revision(engine) == _head()
+
+
+def test_concurrent_startups_migrate_once(tmp_path):
+    path = tmp_path / "race.db"
+
+    def start() -> None:
+        # Each "process" has its own engine, as the API and a standalone worker would
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn:
+            _upgrade_schema_locked(conn)
+        engine.dispose()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for future in [pool.submit(start) for _ in range(3)]:
+            future.result()
+
+    assert _revision(create_engine(f"sqlite:///{path}")) == _head()